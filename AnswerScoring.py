@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+class AnswerScorer:
+    """
+    Vectorized scoring against a pre-normalized answer key.
+
+    The key is split once into a numeric array and a lowercase string
+    array. A whole submission (or many of them) is then scored in a single
+    NumPy/pandas pass over factorized answers with the same rules as
+    UnifiedStudentPerformanceReport.evaluate_answer: answers that parse as
+    numbers are compared numerically, anything else is compared as a
+    stripped, lowercased string.
+    """
+    # Largest dense lookup table, as a multiple of the number of questions
+    DENSE_FACTOR = 4
+
+    def __init__(self, answer_key):
+        self.question_ids = np.array(sorted(answer_key), dtype=np.int64)
+        self.key_numeric, self.key_is_numeric, self.key_text = self._normalize(
+            [answer_key[question_id] for question_id in self.question_ids]
+        )
+
+        # Question ids are usually small integers, so a dense id -> position
+        # table turns every lookup into a single array gather. Sparse or
+        # negative ids would make that table huge, those use a binary search
+        size = int(self.question_ids.max()) + 1 if len(self.question_ids) else 0
+        if len(self.question_ids) and (self.question_ids[0] < 0 or size > self.DENSE_FACTOR * len(self.question_ids) + 1024):
+            self._position_of = None
+        else:
+            self._position_of = np.full(size, -1, dtype=np.int64)
+            self._position_of[self.question_ids] = np.arange(len(self.question_ids))
+
+    def positions(self, question_ids):
+        """
+        Positions of the given ids in question_ids, -1 for unknown ids.
+        """
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        if self._position_of is None:
+            positions = np.minimum(np.searchsorted(self.question_ids, question_ids), len(self.question_ids) - 1)
+            return np.where(self.question_ids[positions] == question_ids, positions, -1)
+        in_range = (question_ids >= 0) & (question_ids < len(self._position_of))
+        positions = np.full(len(question_ids), -1, dtype=np.int64)
+        positions[in_range] = self._position_of[question_ids[in_range]]
+        return positions
+
+    def score(self, question_ids, answers):
+        """
+        Score one submission given as parallel question id / answer columns.
+        Returns an int8 array of 0/1 accuracies. Unknown question ids score 0.
+        """
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        if len(question_ids) != len(answers):
+            raise ValueError("question_ids and answers must have the same length")
+        if not len(question_ids):
+            return np.zeros(0, dtype=np.int8)
+
+        positions = self.positions(question_ids)
+        known = positions >= 0
+        positions = np.maximum(positions, 0)
+
+        # Submissions repeat a handful of distinct answers, so normalize each
+        # distinct value once and broadcast back through the factorized codes
+        codes, uniques = pd.factorize(pd.Series(list(answers), dtype=object))
+        user_numeric, user_is_numeric, user_text = self._normalize(list(uniques) + [None])
+
+        key_is_numeric = self.key_is_numeric[positions]
+        numeric_match = key_is_numeric & user_is_numeric[codes] & (user_numeric[codes] == self.key_numeric[positions])
+        text_match = ~key_is_numeric & ~user_is_numeric[codes] & (user_text[codes] == self.key_text[positions])
+
+        return (known & (numeric_match | text_match)).astype(np.int8)
+
+    def score_matrix(self, question_ids, answer_matrix):
+        """
+        Score many students who answered the same questions in the same order.
+        answer_matrix has one row per student and one column per question id.
+        """
+        answer_matrix = np.asarray(answer_matrix, dtype=object)
+        n_students, n_questions = answer_matrix.shape
+        flat_ids = np.tile(np.asarray(question_ids, dtype=np.int64), n_students)
+        return self.score(flat_ids, answer_matrix.ravel()).reshape(n_students, n_questions)
+
+    def score_batch(self, responses_by_student):
+        """
+        Score {student_id: [(question_id, time_spent, answer), ...]} in one
+        pass and return {student_id: int8 accuracy array}.
+        """
+        students = list(responses_by_student)
+        lengths = [len(responses_by_student[student]) for student in students]
+        rows = [response for student in students for response in responses_by_student[student]]
+
+        question_ids = [response[0] for response in rows]
+        answers = [response[2] for response in rows]
+        accuracy = self.score(question_ids, answers)
+
+        offsets = np.cumsum([0] + lengths)
+        return {
+            student: accuracy[offsets[index]:offsets[index + 1]]
+            for index, student in enumerate(students)
+        }
+
+    @staticmethod
+    def _normalize(values):
+        # Same rules as evaluate_answer: float() when it parses, else stripped lowercase text
+        numeric = np.full(len(values), np.nan)
+        is_numeric = np.zeros(len(values), dtype=bool)
+        text = np.empty(len(values), dtype=object)
+        for index, value in enumerate(values):
+            try:
+                numeric[index] = float(value)
+                is_numeric[index] = True
+            except (ValueError, TypeError):
+                pass
+            text[index] = str(value).strip().lower()
+        return numeric, is_numeric, text
@@ -0,0 +1,105 @@
+import csv
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from EvaluationHandler import UnifiedStudentPerformanceReport
+
+
+def score_class(students, cohort_store, cluster_model=None, update_aggregates=True):
+    """
+    Score a whole class in one pass and return one processed report per student.
+
+    `students` is a list of (student_id, student_name, Submission). All
+    answers to the same test form are classified and scored together, then
+    split back into each student's rows; no report parses or scores on its own.
+    With update_aggregates=False the class is ranked against the cohort
+    without being added to it.
+    """
+    question_ids = np.concatenate([submission.question_ids for _, _, submission in students])
+    answers = np.array([answer for _, _, submission in students for answer in submission.answers], dtype=object)
+    lengths = [len(submission) for _, _, submission in students]
+    forms = np.repeat(np.array([submission.form for _, _, submission in students], dtype=object), lengths)
+
+    question_types = np.empty(len(question_ids), dtype=object)
+    accuracy = np.empty(len(question_ids), dtype=np.int8)
+    for form in dict.fromkeys(forms):
+        rows = forms == form
+        question_bank = UnifiedStudentPerformanceReport.question_bank(form)
+        question_types[rows] = question_bank.question_types_for(question_ids[rows])
+        accuracy[rows] = question_bank.scorer.score(question_ids[rows], answers[rows])
+
+    scored_rows = pd.DataFrame({
+        'student_id': np.repeat([student_id for student_id, _, _ in students], lengths),
+        'student_name': np.repeat([student_name for _, student_name, _ in students], lengths),
+        'question_id': question_ids,
+        'question_type': question_types,
+        'time_spent': np.concatenate([submission.time_spent for _, _, submission in students]),
+        'accuracy': accuracy,
+    })
+
+    reports = []
+    offsets = np.cumsum([0] + lengths)
+    for position, (student_id, student_name, submission) in enumerate(students):
+        report = UnifiedStudentPerformanceReport(student_id, student_name, submission, cohort_store,
+                                                 cluster_model=cluster_model)
+        report.load_scored_rows(scored_rows.iloc[offsets[position]:offsets[position + 1]],
+                                update_aggregates=update_aggregates)
+        report.generate_summary_and_recommendations()
+        reports.append(report)
+    return reports
+
+
+def build_class_archive(reports):
+    """
+    ZIP of every student's PDF plus class_summary.csv. The cohort chart is
+    drawn once and shared by all the reports.
+    """
+    if not reports:
+        raise ValueError("A class archive needs at least one report")
+
+    # Cohort averages and clusters are the same for the whole class
+    shared = reports[0]
+    shared.calculate_average_scores_and_cluster()
+    for report in reports[1:]:
+        report.average_question_type_scores = shared.average_question_type_scores
+        report.question_type_clusters = shared.question_type_clusters
+        report.average_scores_plot = shared.average_scores_plot
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w') as archive:
+        for report in reports:
+            # PDFs are already compressed, store them as they are
+            archive.writestr(f"student_{report.student_id}.pdf", report.generate_report(), compress_type=zipfile.ZIP_STORED)
+        archive.writestr('class_summary.csv', class_summary_csv(reports), compress_type=zipfile.ZIP_DEFLATED)
+    return output.getvalue()
+
+
+def class_summary_csv(reports):
+    """
+    One row per student: scores per question type, percentile ranks,
+    performance bands and group.
+    """
+    question_types = sorted({question_type for report in reports for question_type in report.question_type_scores})
+    header = ['student_id', 'student_name', 'total_score', 'max_score', 'performance_group']
+    for question_type in question_types:
+        header += [f'{question_type}_score', f'{question_type}_band', f'{question_type}_percentile']
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for report in reports:
+        bands = UnifiedStudentPerformanceReport.performance_bands(report.performance_summary)
+        row = [report.student_id, report.student_name, int(report.total_score), report.max_score,
+               report.performance_group or '']
+        for question_type in question_types:
+            ranks = report.percentile_ranks.get(question_type)
+            row += [
+                int(report.question_type_scores.get(question_type, 0)),
+                bands.get(question_type, ''),
+                f"{ranks['accuracy']:.0f}" if ranks else '',
+            ]
+        writer.writerow(row)
+    return buffer.getvalue()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pandas as pd
+
+
+class CohortAggregates:
+    """
+    Running per-question-type accuracy sums and counts for the cohort.
+
+    New student rows are folded in with add_rows() in O(1) per row. The
+    KMeans cluster assignment of the question-type averages is cached and
+    only refit when an average drifts more than `tolerance` (on the 0-1
+    accuracy scale) from the value it was last clustered at, or when
+    `refresh_interval` seconds have passed since the last fit.
+    """
+    TOLERANCE = 0.02
+    REFRESH_INTERVAL = 15 * 60
+    N_CLUSTERS = 3
+
+    def __init__(self, tolerance=None, refresh_interval=None):
+        self.tolerance = self.TOLERANCE if tolerance is None else tolerance
+        self.refresh_interval = self.REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self._sums = {}
+        self._counts = {}
+        self._clusters = None
+        self._clustered_means = None
+        self._clustered_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, data, **options):
+        """
+        Seed the aggregates from a cohort frame with one groupby pass.
+        """
+        aggregates = cls(**options)
+        grouped = data.groupby('question_type', observed=True)['accuracy'].agg(['sum', 'count'])
+        for question_type, row in grouped.iterrows():
+            aggregates._sums[question_type] = float(row['sum'])
+            aggregates._counts[question_type] = int(row['count'])
+        return aggregates
+
+    def add_rows(self, question_types, accuracies):
+        """
+        Fold newly scored rows into the running sums.
+        """
+        with self._lock:
+            for question_type, accuracy in zip(question_types, accuracies):
+                self._sums[question_type] = self._sums.get(question_type, 0.0) + float(accuracy)
+                self._counts[question_type] = self._counts.get(question_type, 0) + 1
+
+    def averages(self):
+        """
+        Mean accuracy per question type, keyed in sorted order.
+        """
+        with self._lock:
+            return {
+                question_type: self._sums[question_type] / self._counts[question_type]
+                for question_type in sorted(self._counts)
+            }
+
+    def average_scores(self):
+        """
+        Average scores (out of 5) per question type with their cluster, in
+        the same shape the report visualizations expect.
+        """
+        means = self.averages()
+        clusters = self._cluster(means)
+        return pd.DataFrame({
+            'question_type': list(means),
+            'accuracy': [mean * 5 for mean in means.values()],  # Scale to 5-point range
+            'cluster': [clusters[question_type] for question_type in means],
+        })
+
+    def _cluster(self, means):
+        with self._lock:
+            if not self._needs_refit(means):
+                return self._clusters
+
+            from sklearn.cluster import KMeans
+
+            n_clusters = min(self.N_CLUSTERS, len(means))
+            kmeans = KMeans(n_clusters=n_clusters, random_state=0)
+            labels = kmeans.fit_predict([[mean] for mean in means.values()])
+
+            self._clusters = dict(zip(means, (int(label) for label in labels)))
+            self._clustered_means = dict(means)
+            self._clustered_at = time.monotonic()
+            return self._clusters
+
+    def _needs_refit(self, means):
+        if self._clusters is None or set(means) != set(self._clustered_means):
+            return True
+        if time.monotonic() - self._clustered_at >= self.refresh_interval:
+            return True
+        return any(
+            abs(mean - self._clustered_means[question_type]) > self.tolerance
+            for question_type, mean in means.items()
+        )
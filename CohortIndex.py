@@ -0,0 +1,92 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+
+class CohortIndex:
+    """
+    Sorted per-question-type distributions of student accuracy and time.
+
+    Each student contributes one point per question type: their mean
+    accuracy (0-1) and mean time spent per question. The points are kept in
+    sorted lists, so a percentile rank is two binary searches instead of a
+    scan over the cohort, and a new student is inserted in place with
+    insort(). Build it from a cohort frame with from_frame().
+    """
+
+    def __init__(self):
+        self._accuracy = {}
+        self._time_spent = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Build the index from a cohort frame with one groupby pass.
+        """
+        index = cls()
+        for question_type, accuracy, time_spent in cls._student_points(data):
+            index._accuracy.setdefault(question_type, []).append(accuracy)
+            index._time_spent.setdefault(question_type, []).append(time_spent)
+        for values in list(index._accuracy.values()) + list(index._time_spent.values()):
+            values.sort()
+        return index
+
+    @staticmethod
+    def _student_points(data):
+        grouped = data.groupby(['student_id', 'question_type'], observed=True).agg(
+            accuracy=('accuracy', 'mean'),
+            time_spent=('time_spent', 'mean'),
+        )
+        return zip(
+            grouped.index.get_level_values('question_type').astype(str),
+            grouped['accuracy'].astype(float),
+            grouped['time_spent'].astype(float),
+        )
+
+    def add_frame(self, rows):
+        """
+        Insert the points of newly scored rows, one per student and question type.
+        """
+        points = list(self._student_points(rows))
+        with self._lock:
+            for question_type, accuracy, time_spent in points:
+                insort(self._accuracy.setdefault(question_type, []), accuracy)
+                insort(self._time_spent.setdefault(question_type, []), time_spent)
+
+    def question_types(self):
+        with self._lock:
+            return sorted(self._accuracy)
+
+    def percentile(self, question_type, accuracy=None, time_spent=None):
+        """
+        Percentile ranks (0-100) of one point against the cohort, ties counted
+        as half. 'accuracy' is the share of students scoring lower, 'time_spent'
+        the share who were slower, so higher is better for both. Returns None
+        for a question type the cohort has never seen.
+        """
+        with self._lock:
+            if question_type not in self._accuracy:
+                return None
+            ranks = {'question_type': question_type, 'students': len(self._accuracy[question_type])}
+            if accuracy is not None:
+                ranks['accuracy'] = self._rank_below(self._accuracy[question_type], float(accuracy))
+            if time_spent is not None:
+                ranks['time_spent'] = 100.0 - self._rank_below(self._time_spent[question_type], float(time_spent))
+            return ranks
+
+    def percentiles_for(self, rows):
+        """
+        Percentile ranks of a student's scored rows, keyed by question type.
+        """
+        return {
+            question_type: self.percentile(question_type, accuracy, time_spent)
+            for question_type, accuracy, time_spent in self._student_points(rows)
+        }
+
+    @staticmethod
+    def _rank_below(values, value):
+        if not values:
+            return 0.0
+        below = bisect_left(values, value)
+        ties = bisect_right(values, value, lo=below) - below
+        return 100.0 * (below + 0.5 * ties) / len(values)
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from CohortAggregates import CohortAggregates
+from CohortIndex import CohortIndex
+from Metrics import METRICS
+
+
+class CohortStore:
+    """
+    Process-wide, versioned holder for the reference cohort data.
+
+    The CSV is parsed once into compact dtypes and only re-read when the
+    file's mtime changes *and* its content hash differs from the loaded copy.
+    Use CohortStore.shared(path) so every report in the process reads the
+    same frame instead of parsing the file again. Running per-question-type
+    aggregates and the percentile index are rebuilt alongside the frame on
+    every reload.
+
+    With a SubmissionLog attached, the rows of real submissions are folded
+    into the baseline on load: the snapshot segments plus whatever was
+    logged after them. A new snapshot triggers one reload, not one per request,
+    and reuses the already parsed CSV rows unless the file itself changed.
+    Logged rows carry real student ids, which overlap the reference cohort's
+    synthetic ones, so they are stored negated in the cohort frame and every
+    student-level grouping keeps the two apart.
+
+    `aggregate_options` (tolerance, refresh_interval) are passed to the
+    CohortAggregates built on every reload.
+    """
+    DTYPES = {
+        'student_id': 'int32',
+        'question_id': 'int32',
+        'question_type': 'category',
+        'time_spent': 'float32',
+        'accuracy': 'int8',
+        'student_name': 'category',
+        'performance_category': 'category',
+    }
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path, submission_log=None, **aggregate_options):
+        self.path = os.path.abspath(path)
+        self.submission_log = submission_log
+        self.aggregate_options = aggregate_options
+        self.version = None
+        self._data = None
+        self._digest = None
+        self._csv_mtime = None
+        self._reference_rows = 0
+        self._aggregates = None
+        self._index = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path, submission_log=None, **aggregate_options):
+        """
+        Return the process-wide store for the given cohort file.
+        """
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls._instances[key] = cls(key, submission_log, **aggregate_options)
+            else:
+                if submission_log is not None and store.submission_log is None:
+                    store.submission_log = submission_log
+                    store._mtime = None
+                if aggregate_options:
+                    store.configure_aggregates(**aggregate_options)
+            return store
+
+    def configure_aggregates(self, **aggregate_options):
+        """
+        Change the cluster refit settings, for the loaded aggregates too.
+        """
+        self.aggregate_options = {**self.aggregate_options, **aggregate_options}
+        if self._aggregates is not None:
+            for name, value in aggregate_options.items():
+                if value is not None:
+                    setattr(self._aggregates, name, value)
+
+    @property
+    def data(self):
+        """
+        The current cohort frame. Treat it as read-only, it is shared.
+        """
+        self.refresh()
+        return self._data
+
+    @property
+    def aggregates(self):
+        """
+        Running accuracy aggregates for the currently loaded cohort.
+        """
+        self.refresh()
+        return self._aggregates
+
+    @property
+    def index(self):
+        """
+        Sorted per-question-type distributions for percentile ranks.
+        """
+        self.refresh()
+        return self._index
+
+    @property
+    def current_version(self):
+        """
+        Content hash of the cohort file (plus the snapshot watermark when a
+        submission log is attached), checked against mtimes first.
+        """
+        self.refresh()
+        return self.version
+
+    def refresh(self):
+        """
+        Reload the cohort if the file or the submission snapshot changed on
+        disk. Returns True on reload.
+        """
+        mtime = self._fingerprint()
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            mtime = self._fingerprint()
+            if mtime == self._mtime:
+                return False
+
+            # Only hash the CSV when it was touched, not on every new snapshot
+            csv_mtime = mtime[0]
+            digest = self._content_hash() if csv_mtime != self._csv_mtime else self._digest
+            self._csv_mtime = csv_mtime
+            watermark = self.submission_log.snapshot_watermark() if self.submission_log is not None else None
+            version = digest if watermark is None else f"{digest}:{watermark}"
+            if version == self.version:
+                # Touched but not modified, keep the parsed frame
+                self._mtime = mtime
+                return False
+
+            self._data = self._load(reparse=digest != self._digest)
+            self._digest = digest
+            self._aggregates = CohortAggregates.from_frame(self._data, **self.aggregate_options)
+            self._index = CohortIndex.from_frame(self._data)
+            self.version = version
+            self._mtime = mtime
+            return True
+
+    def _fingerprint(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if self.submission_log is None:
+            return mtime, None
+        return mtime, self.submission_log.snapshot_mtime()
+
+    @METRICS.timed('cohort_load')
+    def _load(self, reparse=True):
+        if reparse or self._data is None:
+            reference = pd.read_csv(self.path, dtype=self.DTYPES)
+        else:
+            # The CSV rows always come first, slicing them back out copies nothing
+            reference = self._data.iloc[:self._reference_rows]
+        self._reference_rows = len(reference)
+        if self.submission_log is None:
+            return reference
+
+        logged = [self.submission_log.snapshot_frame(), self.submission_log.pending_frame()]
+        logged = [frame for frame in logged if not frame.empty]
+        if not logged:
+            return reference
+        logged = pd.concat(logged, ignore_index=True) if len(logged) > 1 else logged[0]
+        return self._append_logged(reference, logged)
+
+    def _append_logged(self, reference, logged):
+        # One concat per snapshot, with both sides in the compact dtypes
+        columns = [column for column in reference.columns if column in logged.columns]
+        logged = logged[columns].assign(student_id=-logged['student_id'].astype('int64'))
+        for column in columns:
+            dtype = self.DTYPES.get(column)
+            if dtype == 'category':
+                # Same categories on both sides, so the concat stays categorical
+                categories = reference[column].cat.categories
+                values = logged[column]
+                uniques = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else pd.Index(values.unique())
+                added = uniques.difference(categories)
+                if len(added):
+                    categories = categories.append(added)
+                    reference = reference.assign(**{column: reference[column].cat.set_categories(categories)})
+                logged[column] = pd.Categorical(values, categories=categories)
+            elif dtype is not None:
+                logged[column] = logged[column].astype(dtype)
+        return pd.concat([reference, logged], ignore_index=True)
+
+    def _content_hash(self):
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -1,54 +1,67 @@
+import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak, Table as RLTable
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.platypus import Frame, PageTemplate
-from datetime import datetime
+from io import BytesIO
+from CohortStore import CohortStore
+from QuestionBank import QuestionBank
+from SubmissionParser import Submission
+from Metrics import METRICS
+
+# matplotlib and reportlab are imported inside the methods that draw the
+# report, so importing this module (and app.py) stays cheap
 
 
 
 class UnifiedStudentPerformanceReport:
-    TIME_THRESHOLD = 35
     ACCURACY_THRESHOLD = 1
     CLUSTER_LABELS = {0: 'High Performers', 1: 'Moderate Performers', 2: 'Low Performers'}
 
-    ANSWER_KEY = {
-        1: 9, 2: 9, 3: 4, 4: 9, 5: 4,
-        6: 'triangle', 7: 'sphere', 8: 'square',
-        9: 'cube', 10: 'cone',
-        11: 7, 12: 8, 13: 8, 14: 9, 15: 16
+    # Advice per performance_rule() outcome, None is a mix of results
+    RECOMMENDATIONS = {
+        'Mastered': "Keep up the good work!",
+        'Needs Improvement': "Focus on time management and practice.",
+        'Struggling': "Consider reviewing fundamentals and additional practice.",
+        None: "Keep practicing to maintain skills.",
     }
 
-    def __init__(self, student_id, student_name, responses, synthetic_data_path):
+    # Answers, question types, time thresholds and test forms, reloaded when the file changes
+    QUESTION_BANK_PATH = os.environ.get(
+        'QUESTION_BANK_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'question_bank.json')
+    )
+
+    # 'vector' draws the charts as native ReportLab drawings, 'matplotlib' renders PNGs
+    CHART_BACKEND = os.environ.get('REPORT_CHART_BACKEND', 'vector')
+
+    # Bump whenever the report's layout or content changes, so cached PDFs
+    # built by an older version are never served again
+    REPORT_FORMAT_VERSION = 1
+
+    def __init__(self, student_id, student_name, responses, cohort_store, cluster_model=None):
         self.student_id = student_id
         self.student_name = student_name
         self.responses = responses
-        self.synthetic_data = pd.read_csv(synthetic_data_path)
+        # Test form the responses answer, None for the bank's default form
+        self.form = getattr(responses, 'form', None)
+        self.cohort_store = cohort_store
+        self.cluster_model = cluster_model
+        self.performance_group = None
+        self.progress = {}
+        self.synthetic_data = cohort_store.data
         self.new_student_df = None
-        self.combined_data = None
         self.average_performance = None
         self.performance_summary = None
         self.recommendations = []
         self.total_score = 0
         self.max_score = 0
         self.question_type_scores = {}
+        self.question_type_totals = {}
+        self.percentile_ranks = {}
         self.clustering_successful = False
         self.average_question_type_scores = None
         self.question_type_clusters = None
+        self.time_spent_plot = None
+        self.average_scores_plot = None
 
     # def evaluate_answer(self, question_id, user_answer):
     #     correct_answer = self.ANSWER_KEY.get(question_id)
@@ -57,7 +70,7 @@ class UnifiedStudentPerformanceReport:
     #     return 1 if user_answer == correct_answer else 0
 
     def evaluate_answer(self, question_id, user_answer):
-      correct_answer = self.ANSWER_KEY.get(question_id)
+      correct_answer = self.question_bank(self.form).answer(question_id)
 
       # Handle numeric answers
       try:
@@ -70,28 +83,77 @@ class UnifiedStudentPerformanceReport:
       # Handle string answers
       return 1 if str(user_answer).strip().lower() == str(correct_answer).strip().lower() else 0
 
-    def process_responses(self):
-        new_data = []
-        for response in self.responses:
-            question_id, time_spent, user_answer = response
-            question_type = ['arithmetic', 'geometry', 'number_sequence'][(question_id - 1) // 5]
-            accuracy = self.evaluate_answer(question_id, user_answer)
-            new_data.append([self.student_id, self.student_name, question_id, question_type, time_spent, accuracy])
+    @classmethod
+    def question_bank(cls, form=None):
+        """
+        The compiled index of one form of the shared question bank, the default form for None.
+        """
+        return QuestionBank.shared(cls.QUESTION_BANK_PATH).form(form)
 
-        self.new_student_df = pd.DataFrame(new_data, columns=['student_id', 'student_name', 'question_id', 'question_type', 'time_spent', 'accuracy'])
+    @classmethod
+    def answer_scorer(cls, form=None):
+        """
+        Shared vectorized scorer for a form of the current question bank.
+        """
+        return cls.question_bank(form).scorer
 
-        self.new_student_df['performance_category'] = np.where(
-            (self.new_student_df['time_spent'] <= self.TIME_THRESHOLD) & (self.new_student_df['accuracy'] == self.ACCURACY_THRESHOLD),
+    @METRICS.timed('process_responses')
+    def process_responses(self, update_aggregates=True):
+        if isinstance(self.responses, Submission):
+            # Already validated into columns by SubmissionParser
+            question_ids, time_spent, user_answers = self.responses.question_ids, self.responses.time_spent, self.responses.answers
+        else:
+            # Split the (question_id, time_spent, answer) tuples into columns and score them in one pass
+            question_ids, time_spent, user_answers = (list(column) for column in zip(*self.responses)) if self.responses else ([], [], [])
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        question_bank = self.question_bank(self.form)
+
+        scored_rows = pd.DataFrame({
+            'student_id': self.student_id,
+            'student_name': self.student_name,
+            'question_id': question_ids,
+            'question_type': question_bank.question_types_for(question_ids),
+            'time_spent': time_spent,
+            'accuracy': question_bank.scorer.score(question_ids, user_answers),
+        })
+
+        self.load_scored_rows(scored_rows, update_aggregates=update_aggregates)
+
+    @classmethod
+    def classify(cls, time_spent, accuracy, time_thresholds):
+        """
+        performance_category per row: Mastered when correct within the time
+        threshold, Needs Improvement when correct but slower, else Struggling.
+        """
+        correct = np.asarray(accuracy) == cls.ACCURACY_THRESHOLD
+        time_spent = np.asarray(time_spent)
+        return np.where(
+            correct & (time_spent <= time_thresholds),
             'Mastered',
-            np.where((self.new_student_df['time_spent'] > self.TIME_THRESHOLD) & (self.new_student_df['accuracy'] == self.ACCURACY_THRESHOLD),
-                     'Needs Improvement',
-                     'Struggling')
+            np.where(correct & (time_spent > time_thresholds), 'Needs Improvement', 'Struggling')
+        )
+
+    def load_scored_rows(self, scored_rows, update_aggregates=True):
+        """
+        Use rows that already carry question_type, time_spent and accuracy,
+        e.g. a student's rows from a cohort file, instead of scoring responses.
+        """
+        self.new_student_df = scored_rows.reset_index(drop=True)
+
+        # Each question has its own time threshold, the bank's default_time_threshold covers unknown ids
+        time_thresholds = self.question_bank(self.form).time_thresholds_for(self.new_student_df['question_id'])
+        self.new_student_df['performance_category'] = self.classify(
+            self.new_student_df['time_spent'].to_numpy(), self.new_student_df['accuracy'].to_numpy(), time_thresholds
         )
 
         self.total_score = self.new_student_df['accuracy'].sum()
         self.max_score = len(self.new_student_df)
 
-        self.combined_data = pd.concat([self.synthetic_data, self.new_student_df], ignore_index=True)
+        # Rank against the cohort before this student is added to it
+        self.percentile_ranks = self.cohort_store.index.percentiles_for(self.new_student_df)
+
+        if update_aggregates:
+            self.add_to_cohort()
 
         # Calculate scores for each question type
         self.question_type_scores = (
@@ -99,190 +161,180 @@ class UnifiedStudentPerformanceReport:
             .sum()
             .to_dict()
         )
+        self.question_type_totals = self.new_student_df['question_type'].value_counts().to_dict()
 
-    def generate_summary_and_recommendations(self):
-        self.performance_summary = self.new_student_df.groupby('question_type').performance_category.value_counts().unstack().fillna(0)
-        self.performance_summary['Total'] = self.performance_summary.sum(axis=1)
+    def add_to_cohort(self):
+        """
+        Fold this student's rows into the running cohort aggregates and percentile index.
+        """
+        self.cohort_store.aggregates.add_rows(self.new_student_df['question_type'], self.new_student_df['accuracy'])
+        self.cohort_store.index.add_frame(self.new_student_df)
+
+    @staticmethod
+    def summarize(scored_rows):
+        """
+        Percentage of Mastered / Needs Improvement / Struggling rows per question type.
+        """
+        performance_summary = scored_rows.groupby('question_type', observed=True).performance_category.value_counts().unstack().fillna(0)
+        performance_summary['Total'] = performance_summary.sum(axis=1)
 
         for category in ['Mastered', 'Needs Improvement', 'Struggling']:
-            if category not in self.performance_summary.columns:
-                self.performance_summary[category] = 0
-            self.performance_summary[category] = (self.performance_summary[category] / self.performance_summary['Total']) * 100
+            if category not in performance_summary.columns:
+                performance_summary[category] = 0
+            performance_summary[category] = (performance_summary[category] / performance_summary['Total']) * 100
+
+        performance_summary.drop(columns=['Total'], inplace=True)
+        return performance_summary
+
+    @staticmethod
+    def performance_rule(mastered, needs_improvement, struggling):
+        """
+        Which band's rule a question type's percentages match, None for mixed results.
+        """
+        if mastered >= 80:
+            return 'Mastered'
+        elif needs_improvement > 20:
+            return 'Needs Improvement'
+        elif struggling >= 20:
+            return 'Struggling'
+        return None
+
+    @classmethod
+    def performance_band(cls, mastered, needs_improvement, struggling):
+        """
+        The band a question type falls in, using the same rules as the recommendations.
+        """
+        # Mixed results, keep practicing at the regular level
+        return cls.performance_rule(mastered, needs_improvement, struggling) or 'Needs Improvement'
+
+    @classmethod
+    def performance_bands(cls, performance_summary):
+        return {
+            question_type: cls.performance_band(row.get('Mastered', 0), row.get('Needs Improvement', 0), row.get('Struggling', 0))
+            for question_type, row in performance_summary.iterrows()
+        }
 
-        self.performance_summary.drop(columns=['Total'], inplace=True)
+    @METRICS.timed('summary')
+    def generate_summary_and_recommendations(self):
+        self.performance_summary = self.summarize(self.new_student_df)
 
         for question_type, row in self.performance_summary.iterrows():
-            mastered = row.get('Mastered', 0)
-            needs_improvement = row.get('Needs Improvement', 0)
-            struggling = row.get('Struggling', 0)
-
-            if mastered >= 80:
-                self.recommendations.append((question_type, f"For {question_type}, Keep up the good work!"))
-            elif needs_improvement > 20:
-                self.recommendations.append((question_type, f"For {question_type}, Focus on time management and practice."))
-            elif struggling >= 20:
-                self.recommendations.append((question_type, f"For {question_type}, Consider reviewing fundamentals and additional practice."))
-            else:
-                self.recommendations.append((question_type, f"For {question_type}, Keep practicing to maintain skills."))
+            rule = self.performance_rule(row.get('Mastered', 0), row.get('Needs Improvement', 0), row.get('Struggling', 0))
+            self.recommendations.append((question_type, f"For {question_type}, {self.RECOMMENDATIONS[rule]}"))
+
+        # Student-level group from the offline-trained model, one of CLUSTER_LABELS
+        if self.cluster_model is not None:
+            with METRICS.timer('student_cluster'):
+                self.performance_group = self.cluster_model.predict_rows(self.new_student_df)
+            self.clustering_successful = True
 
     def calculate_average_scores_and_cluster(self):
         """
         Calculate average scores per question type and perform clustering.
         """
-        # Calculate average scores
-        average_scores = self.combined_data.groupby("question_type")["accuracy"].mean() * 5  # Scale to 5-point range
-        average_scores = average_scores.reset_index()
-
-        # Perform clustering
-        kmeans = KMeans(n_clusters=3, random_state=0)
-        clusters = kmeans.fit_predict(average_scores["accuracy"].values.reshape(-1, 1))
-        average_scores["cluster"] = clusters
+        # Averages come from the running aggregates, clusters are only refit on drift
+        aggregates = self.cohort_store.aggregates
+        with METRICS.timer('clustering'):
+            average_scores = aggregates.average_scores()
 
         # Save for report generation
         self.average_question_type_scores = average_scores
-        self.question_type_clusters = kmeans
+        self.question_type_clusters = dict(zip(average_scores["question_type"], average_scores["cluster"]))
 
         # Visualize clustered bar chart
-        self.visualize_average_scores_with_clusters(average_scores)
+        self.average_scores_plot = self.visualize_average_scores_with_clusters(average_scores)
 
+    @METRICS.timed('visualize_average_scores')
     def visualize_average_scores_with_clusters(self, average_scores):
         """
         Visualize average scores per question type with clusters.
         """
-        plt.figure(figsize=(10, 6))
+        if self.CHART_BACKEND == 'vector':
+            from ReportCharts import average_scores_chart
+            return average_scores_chart(average_scores)
+
+        from matplotlib.figure import Figure
+
+        # Figure objects rather than pyplot, so concurrent reports share no state
+        figure = Figure(figsize=(10, 6))
+        ax = figure.subplots()
         for cluster in np.unique(average_scores["cluster"]):
             cluster_data = average_scores[average_scores["cluster"] == cluster]
-            plt.bar(
+            ax.bar(
                 cluster_data["question_type"],
                 cluster_data["accuracy"],
                 label=f"Cluster {cluster + 1}",
             )
 
-        plt.title("Average Student Performance")
-        plt.xlabel("Question Type")
-        plt.ylabel("Average Score Obtained (Out of 5)")
-        plt.ylim(0, 5)
-        plt.xticks(rotation=45)
-        plt.legend(title="Clusters")
-        plt.tight_layout()
-        plt.savefig("average_scores_clusters.png")
-        plt.close()
+        ax.set_title("Average Student Performance")
+        ax.set_xlabel("Question Type")
+        ax.set_ylabel("Average Score Obtained (Out of 5)")
+        ax.set_ylim(0, 5)
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.legend(title="Clusters")
+        figure.tight_layout()
+        return self._render_png(figure)
 
+    @METRICS.timed('visualize_time_spent')
     def visualize_time_spent(self):
-        plt.figure(figsize=(10, 6))
-        for question_type in self.new_student_df['question_type'].unique():
-            subset = self.new_student_df[self.new_student_df['question_type'] == question_type]
-            plt.bar(subset['question_id'], subset['time_spent'], label=question_type, alpha=0.7)
-        plt.xlabel("Question ID")
-        plt.ylabel("Time Spent (seconds)")
-        plt.title(f"Time Spent on Each Question by {self.student_name}")
-        plt.legend(title="Question Type")
-        plt.tight_layout()
-        plt.savefig("time_spent_plot.png")
-        plt.close()
+        if self.CHART_BACKEND == 'vector':
+            from ReportCharts import time_spent_chart
+            self.time_spent_plot = time_spent_chart(self.new_student_df, self.student_name)
+            return self.time_spent_plot
 
+        from matplotlib.figure import Figure
 
+        figure = Figure(figsize=(10, 6))
+        ax = figure.subplots()
+        for question_type in self.new_student_df['question_type'].unique():
+            subset = self.new_student_df[self.new_student_df['question_type'] == question_type]
+            ax.bar(subset['question_id'], subset['time_spent'], label=question_type, alpha=0.7)
+        ax.set_xlabel("Question ID")
+        ax.set_ylabel("Time Spent (seconds)")
+        ax.set_title(f"Time Spent on Each Question by {self.student_name}")
+        ax.legend(title="Question Type")
+        figure.tight_layout()
+        self.time_spent_plot = self._render_png(figure)
+        return self.time_spent_plot
+
+    @staticmethod
+    def _chart_flowable(chart, Image, inch):
+        # PNG buffers from matplotlib need wrapping, vector drawings are already flowables.
+        # A fresh buffer per document, so one chart can be shared by many reports
+        if isinstance(chart, BytesIO):
+            return Image(BytesIO(chart.getvalue()), width=3*inch, height=2*inch)
+        return chart
+
+    @staticmethod
+    def _render_png(figure):
+        buffer = BytesIO()
+        figure.savefig(buffer, format="png")
+        buffer.seek(0)
+        return buffer
+
+
+    @METRICS.timed('generate_report')
     def generate_report(self):
-        self.visualize_time_spent()
-
-        # Add average scores visualization
-        self.calculate_average_scores_and_cluster()
-
-        file_name = f"performance_report.pdf"
-        doc = SimpleDocTemplate(
-            file_name,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        styles = getSampleStyleSheet()
-
-        # Define custom styles with Times-Roman font and bold headings
-        styles.add(ParagraphStyle(
-            name='TitleStyle',
-            parent=styles['Title'],
-            fontName='Times-Roman',
-            alignment=TA_CENTER,
-            fontSize=18,
-            spaceAfter=20,
-            textColor=colors.black
-        ))
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer, Image, Table as RLTable
+        from ReportTemplate import get_report_template
 
-        styles.add(ParagraphStyle(
-            name='NormalStyle',
-            parent=styles['Normal'],
-            fontName='Times-Roman',
-            fontSize=12,
-            leading=15,
-            alignment=TA_LEFT
-        ))
+        self.visualize_time_spent()
 
-        styles.add(ParagraphStyle(
-            name='SubtitleStyle',
-            parent=styles['Heading2'],
-            fontName='Times-Roman',
-            alignment=TA_LEFT,
-            spaceAfter=10,
-            spaceBefore=20,
-            fontSize=14,
-            textColor=colors.black,
-            bold=True  # Make subtitles bold
-        ))
+        # Add average scores visualization, unless a class batch already shared one
+        if self.average_scores_plot is None:
+            self.calculate_average_scores_and_cluster()
 
-        styles.add(ParagraphStyle(
-            name='BulletStyle',
-            parent=styles['Normal'],
-            fontName='Times-Roman',
-            leftIndent=20,
-            bulletIndent=10,
-            spaceAfter=5,
-            bulletFontName='Times-Roman'
-        ))
+        # Styles, page template and boilerplate are built once per process,
+        # only the student-specific flowables are created here
+        template = get_report_template()
+        styles = template.styles
+        static = template.static
 
         elements = []
 
-        # Footer Function with red text
-        def footer(canvas, doc):
-            canvas.saveState()
-            canvas.setFont('Times-Roman', 10)
-            
-            # Get current date and time
-            current_datetime = datetime.now().strftime("%B %d, %Y %I:%M %p")
-            
-            # Create footer text
-            footer_text = f"Generated by AI - {current_datetime}"
-            
-            # Set the text color to red for "Generated by AI"
-            canvas.setFillColor(colors.black)
-            canvas.drawCentredString(
-                letter[0] / 2.0,
-                0.75 * inch,
-                footer_text
-            )
-            canvas.restoreState()
-
-        # Add Page Template with Header and Footer
-        frame = Frame(
-            doc.leftMargin,
-            doc.bottomMargin,
-            doc.width,
-            doc.height,
-            id='normal'
-        )
-        template = PageTemplate(
-            id='header_footer',
-            frames=frame,
-            onPageEnd=footer
-        )
-        doc.addPageTemplates([template])
-
         # Title
-        elements.append(Paragraph(
-            f"<b>Performance Report</b>",
-            styles['TitleStyle']
-        ))
+        elements.append(static['title'])
 
         ## Total Score
         elements.append(Paragraph(
@@ -290,9 +342,14 @@ class UnifiedStudentPerformanceReport:
             styles['NormalStyle']
         ))
         elements.append(Paragraph(
-            f"<b>Out of:</b> 15",
+            f"<b>Out of:</b> {self.max_score}",
             styles['NormalStyle']
         ))
+        if self.performance_group is not None:
+            elements.append(Paragraph(
+                f"<b>Performance Group:</b> {self.performance_group}",
+                styles['NormalStyle']
+            ))
         elements.append(Spacer(1, 12))
 
         # Scores by Question Type Table
@@ -301,36 +358,59 @@ class UnifiedStudentPerformanceReport:
             score_data.append([
                 question_type.capitalize(),
                 f"{score}",
-                "5"
+                f"{self.question_type_totals.get(question_type, 0)}"
             ])
-        score_data.append(["Overall", f"{self.total_score}", "15"])
+        score_data.append(["Overall", f"{self.total_score}", f"{self.max_score}"])
 
         score_table = RLTable(score_data, colWidths=[2*inch, 2*inch, 2*inch])
-        score_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#4F81BD")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Roman'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor("#DCE6F1")),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),  # Add grid borders
-            ('BORDER', (0, 0), (-1, -1), 1, colors.black)  # Add border around the table
-        ]))
-        elements.append(Paragraph(
-            f"<b>Scores by Question Type:</b>",
-            styles['SubtitleStyle']
-        ))
+        score_table.setStyle(template.score_table_style)
+        elements.append(static['scores_heading'])
         elements.append(Spacer(1, 8))
         elements.append(score_table)
         elements.append(Spacer(1, 12))
 
+        # Percentile ranks against the cohort
+        percentile_data = [["Question Type", "Score (better than)", "Speed (faster than)"]]
+        for question_type, ranks in self.percentile_ranks.items():
+            if ranks is None:
+                continue
+            percentile_data.append([
+                question_type.capitalize(),
+                f"{ranks['accuracy']:.0f}% of students",
+                f"{ranks['time_spent']:.0f}% of students"
+            ])
+        if len(percentile_data) > 1:
+            percentile_table = RLTable(percentile_data, colWidths=[2*inch, 2*inch, 2*inch])
+            percentile_table.setStyle(template.score_table_style)
+            elements.append(static['percentiles_heading'])
+            elements.append(Spacer(1, 8))
+            elements.append(percentile_table)
+            elements.append(Spacer(1, 12))
+
+        # Progress across repeated tests, from the student's rollups
+        progress_data = [["Question Type", "Tests Taken", "First Score", "Latest Score", "Change", "Moving Average"]]
+        for question_type, rollup in sorted(self.progress.items()):
+            if rollup['attempts'] < 2:
+                continue
+            progress_data.append([
+                question_type.capitalize(),
+                f"{rollup['attempts']}",
+                f"{rollup['first']['accuracy']:.0%}",
+                f"{rollup['latest']['accuracy']:.0%}",
+                f"{rollup['trend']['accuracy'] * 100:+.0f} pts",
+                f"{rollup['moving_average']['accuracy']:.0%}"
+            ])
+        if len(progress_data) > 1:
+            progress_table = RLTable(progress_data, colWidths=[1.3*inch, 0.95*inch, 0.95*inch, 1.05*inch, 0.8*inch, 1.3*inch])
+            progress_table.setStyle(template.score_table_style)
+            elements.append(static['progress_heading'])
+            elements.append(Spacer(1, 8))
+            elements.append(progress_table)
+            elements.append(Spacer(1, 12))
+
         # Recommendations as Bullet Points
         if self.recommendations:
-            elements.append(Paragraph(
-                f"<b>Recommendations</b>",
-                styles['SubtitleStyle']
-            ))
+            elements.append(static['recommendations_heading'])
             for rec in self.recommendations:
                 # Use bullet list format
                 elements.append(Paragraph(
@@ -340,76 +420,56 @@ class UnifiedStudentPerformanceReport:
             elements.append(Spacer(1, 12))
 
         # Graphs Side by Side
-        if os.path.exists("time_spent_plot.png") and os.path.exists("average_scores_clusters.png"):
+        if self.time_spent_plot is not None and self.average_scores_plot is not None:
             # Create a table for graphs with proper alignment and sizing
             graph_table_data = [
                 [
-                    Image("time_spent_plot.png", width=3*inch, height=2*inch),
-                    Image("average_scores_clusters.png", width=3*inch, height=2*inch)
+                    self._chart_flowable(self.time_spent_plot, Image, inch),
+                    self._chart_flowable(self.average_scores_plot, Image, inch)
                 ]
             ]
             graphs_table = RLTable(graph_table_data, colWidths=[3*inch, 3*inch])
-            graphs_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                ('BORDER', (0, 0), (-1, -1), 1, colors.black)  # Add border around graph table
-            ]))
-            
+            graphs_table.setStyle(template.graphs_table_style)
+
             # Add performance visualizations title
-            elements.append(Paragraph(
-                f"<b>Performance Visualizations:</b>",
-                styles['SubtitleStyle']
-            ))
+            elements.append(static['visualizations_heading'])
             elements.append(Spacer(1, 12))
             elements.append(graphs_table)
             elements.append(Spacer(1, 12))
-            
-            # Define custom style for paragraph with Times-Roman font and specific font size
-            elements.append(Paragraph(
-                "The visualizations provided above offer a detailed overview of your child's performance. "
-                "These insights will help you better understand key areas of strength and opportunities for improvement. "
-                "Thank you for your attention.",
-                ParagraphStyle(
-                    name='NormalStyleTimesRoman',
-                    fontName='Times-Roman',
-                    fontSize=10,  # Adjust the font size as needed
-                    leading=15,   # Adjust line spacing as needed
-                    alignment=TA_LEFT
-                )
-            ))
-
+            elements.append(static['visualizations_note'])
             elements.append(Spacer(1, 12))
         else:
-            elements.append(Paragraph(
-                "Graphs not found.",
-                styles['NormalStyle']
-            ))
+            elements.append(static['graphs_missing'])
             elements.append(Spacer(1, 12))
 
+        # Build the PDF in memory, the caller decides where it is stored
+        output = BytesIO()
+        template.build(output, elements)
+
+        return output.getvalue()
 
-        # Build PDF
-        doc.build(elements)
 
-        # Clean up images
-        if os.path.exists("time_spent_plot.png"):
-            os.remove("time_spent_plot.png")
-        if os.path.exists("average_scores_clusters.png"):
-            os.remove("average_scores_clusters.png")
 
-        print(f"\nReport generated: {file_name}")
 
 
+def main():
+    """
+    Example usage: build a report for a sample submission and save it to disk.
+    """
+    responses = [(1, 2, '9'), (2, 2, '9'), (3, 3, '4'), (4, 2, '9'), (5, 2, '4'), (6, 3, 'Triangle'), (7, 8, 'Sphere'), 
+         (8, 3, 'Square'), (9, 5, 'Cube'), (10, 6, 'Cone'), (11, 6, '8'), (12, 3, '8'), (13, 2, '8'), (14, 2, '9'), (15, 3, '16')]
 
+    cohort_store = CohortStore.shared('classified_student_data.csv')  # Update the path as needed
+    student_report = UnifiedStudentPerformanceReport(4, "Hafsaaaa", responses, cohort_store)
+    student_report.process_responses()
+    student_report.generate_summary_and_recommendations()
+    pdf_bytes = student_report.generate_report()
 
+    file_name = "performance_report.pdf"
+    with open(file_name, "wb") as report_file:
+        report_file.write(pdf_bytes)
+    print(f"\nReport generated: {file_name}")
 
-# Example Usage
-responses = [(1, 2, '9'), (2, 2, '9'), (3, 3, '4'), (4, 2, '9'), (5, 2, '4'), (6, 3, 'Triangle'), (7, 8, 'Sphere'), 
-     (8, 3, 'Square'), (9, 5, 'Cube'), (10, 6, 'Cone'), (11, 6, '8'), (12, 3, '8'), (13, 2, '8'), (14, 2, '9'), (15, 3, '16')]
 
-synthetic_data_path = 'classified_student_data.csv'  # Update the path as needed
-student_report = UnifiedStudentPerformanceReport(4, "Hafsaaaa", responses, synthetic_data_path)
-student_report.process_responses()
-student_report.generate_summary_and_recommendations()
-student_report.generate_report()
+if __name__ == '__main__':
+    main()
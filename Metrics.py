@@ -0,0 +1,141 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    In-process latency histograms and gauges, rendered in Prometheus text format.
+
+    Recording an observation is a bisect into fixed buckets and a couple of
+    integer increments under a lock, cheap enough to leave on in
+    production. Built with enabled=False, timed() hands back the function
+    it decorates untouched and timer() is an empty context manager, so the
+    instrumentation costs nothing when switched off. Numbers are per
+    process; scrape each worker, or sum them in Prometheus.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, enabled=True, buckets=None):
+        self.enabled = enabled
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._histograms = {}
+        self._gauges = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][slot] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def add(self, name, amount, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def add_collector(self, collect):
+        """
+        Register a callable returning [(name, kind, help, {label tuple: value})]
+        that is read at scrape time, e.g. cache statistics.
+        """
+        self._collectors.append(collect)
+
+    @contextmanager
+    def timer(self, stage):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('countbuddy_report_stage_seconds', time.perf_counter() - started, stage=stage)
+
+    def timed(self, stage):
+        """
+        Decorator recording every call of the function under the given stage name.
+        """
+        def decorate(function):
+            if not self.enabled:
+                return function
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe('countbuddy_report_stage_seconds', time.perf_counter() - started, stage=stage)
+            return wrapper
+        return decorate
+
+    def render(self):
+        """
+        Everything recorded so far in the Prometheus text exposition format.
+        """
+        with self._lock:
+            histograms = {key: ([*value[0]], value[1], value[2]) for key, value in self._histograms.items()}
+            gauges = dict(self._gauges)
+
+        lines = []
+        for name in sorted({key[0] for key in histograms}):
+            lines.extend(self._header(name, 'histogram'))
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{self._labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total!r}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+
+        for name in sorted({key[0] for key in gauges}):
+            lines.extend(self._header(name, 'gauge'))
+            for (metric, labels), value in sorted(gauges.items()):
+                if metric == name:
+                    lines.append(f"{name}{self._labels(labels)} {value}")
+
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples.items():
+                    lines.append(f"{name}{self._labels(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, name, default_kind):
+        kind, help_text = self._help.get(name, (default_kind, name))
+        return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escaped = []
+        for key, value in labels:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{key}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+
+
+METRICS = Metrics(enabled=os.environ.get('METRICS_ENABLED', '1') != '0')
+METRICS.describe('countbuddy_report_stage_seconds', 'histogram', "Time spent in each report pipeline stage.")
+METRICS.describe('countbuddy_http_request_seconds', 'histogram', "Flask request latency by route, method and status.")
+METRICS.describe('countbuddy_http_requests_in_flight', 'gauge', "Requests currently being handled, by route.")
@@ -0,0 +1,88 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full. retry_after is a hint in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Password hashing is busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited worker pool.
+
+    At most `max_workers` hashes run at once and at most `max_pending` more
+    may wait. Anything beyond that is rejected straight away with HashingBusy
+    instead of piling up request threads, so a burst of logins cannot starve
+    the rest of the app. With enabled=False hashing runs inline on the
+    calling thread, as before.
+    """
+
+    def __init__(self, rounds=12, max_workers=2, max_pending=16, enabled=True):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._admission = threading.BoundedSemaphore(max_workers + max_pending)
+        self._in_system = 0
+        self._avg_seconds = 0.25
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        """
+        bcrypt hash of the password, as a str, using the configured cost factor.
+        """
+        return self._run(self._hash, password)
+
+    def check(self, password, hashed_password):
+        return self._run(self._check, password, hashed_password)
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def _check(password, hashed_password):
+        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def _run(self, func, *args):
+        if not self.enabled:
+            return func(*args)
+
+        if not self._admission.acquire(blocking=False):
+            raise HashingBusy(self.retry_after())
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+            self._in_system += 1
+        try:
+            return self._executor.submit(self._timed, func, *args).result()
+        finally:
+            with self._lock:
+                self._in_system -= 1
+            self._admission.release()
+
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def retry_after(self):
+        """
+        Whole seconds until the current backlog should have drained.
+        """
+        with self._lock:
+            backlog = self._in_system / self.max_workers
+            return max(1, math.ceil(backlog * self._avg_seconds))
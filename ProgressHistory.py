@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class ProgressHistory:
+    """
+    Per-student progress across repeated tests, kept as incremental rollups.
+
+    Every attempt adds one row per question type (accuracy and mean time per
+    question) to progress_attempts and updates that type's rollup row in
+    place: attempt count, first and latest values and an exponential moving
+    average. Recording an attempt therefore touches a fixed number of rows
+    by primary key and never rescans earlier submissions; the trend is the
+    latest value minus the first. An attempt recorded with a submission key
+    is counted once per student and key, so retries of the same submission
+    never show up as retakes.
+    """
+    ALPHA = 0.3
+    HISTORY_LIMIT = 20
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS progress_rollups (
+            student_id INTEGER NOT NULL,
+            question_type TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            first_accuracy REAL NOT NULL,
+            first_time_spent REAL NOT NULL,
+            latest_accuracy REAL NOT NULL,
+            latest_time_spent REAL NOT NULL,
+            ema_accuracy REAL NOT NULL,
+            ema_time_spent REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (student_id, question_type)
+        );
+        CREATE TABLE IF NOT EXISTS progress_attempts (
+            student_id INTEGER NOT NULL,
+            question_type TEXT NOT NULL,
+            attempt INTEGER NOT NULL,
+            attempted_at REAL NOT NULL,
+            accuracy REAL NOT NULL,
+            time_spent REAL NOT NULL,
+            PRIMARY KEY (student_id, question_type, attempt)
+        );
+        CREATE TABLE IF NOT EXISTS progress_submissions (
+            student_id INTEGER NOT NULL,
+            submission_key TEXT NOT NULL,
+            recorded_at REAL NOT NULL,
+            PRIMARY KEY (student_id, submission_key)
+        );
+    """
+
+    def __init__(self, path, alpha=None):
+        self.path = os.path.abspath(path)
+        self.alpha = self.ALPHA if alpha is None else alpha
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Opened on first use, and again in a forked child: SQLite handles must not cross a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def record_attempt(self, student_id, scored_rows, attempted_at=None, submission_key=None):
+        """
+        Fold one sitting's scored rows into the student's rollups and return
+        (progress(), recorded). Nothing is folded in, and recorded is False,
+        if `submission_key` was already recorded for the student.
+        """
+        attempted_at = time.time() if attempted_at is None else attempted_at
+        per_type = {}
+        for question_type, accuracy, time_spent in zip(
+            scored_rows['question_type'], scored_rows['accuracy'], scored_rows['time_spent']
+        ):
+            totals = per_type.setdefault(str(question_type), [0.0, 0.0, 0])
+            totals[0] += float(accuracy)
+            totals[1] += float(time_spent)
+            totals[2] += 1
+
+        recorded = True
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                # Takes the write lock before the rollups are read, so workers in other
+                # processes never compute the same attempt number
+                conn.execute("BEGIN IMMEDIATE")
+                if submission_key is not None and not conn.execute(
+                    "INSERT OR IGNORE INTO progress_submissions VALUES (?, ?, ?)",
+                    (int(student_id), submission_key, attempted_at),
+                ).rowcount:
+                    # Already counted, a retry of the same submission
+                    recorded = False
+                    per_type = {}
+                for question_type, (accuracy_sum, time_sum, count) in per_type.items():
+                    self._update_rollup(conn, int(student_id), question_type,
+                                        accuracy_sum / count, time_sum / count, attempted_at)
+        return self.progress(student_id), recorded
+
+    def _update_rollup(self, conn, student_id, question_type, accuracy, time_spent, attempted_at):
+        rollup = conn.execute(
+            "SELECT attempts, ema_accuracy, ema_time_spent FROM progress_rollups "
+            "WHERE student_id = ? AND question_type = ?",
+            (student_id, question_type),
+        ).fetchone()
+
+        if rollup is None:
+            attempt = 1
+            conn.execute(
+                "INSERT INTO progress_rollups VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)",
+                (student_id, question_type, accuracy, time_spent, accuracy, time_spent, accuracy, time_spent, attempted_at),
+            )
+        else:
+            attempts, ema_accuracy, ema_time_spent = rollup
+            attempt = attempts + 1
+            conn.execute(
+                "UPDATE progress_rollups SET attempts = ?, latest_accuracy = ?, latest_time_spent = ?, "
+                "ema_accuracy = ?, ema_time_spent = ?, updated_at = ? WHERE student_id = ? AND question_type = ?",
+                (
+                    attempt, accuracy, time_spent,
+                    self.alpha * accuracy + (1 - self.alpha) * ema_accuracy,
+                    self.alpha * time_spent + (1 - self.alpha) * ema_time_spent,
+                    attempted_at, student_id, question_type,
+                ),
+            )
+
+        conn.execute(
+            "INSERT INTO progress_attempts VALUES (?, ?, ?, ?, ?, ?)",
+            (student_id, question_type, attempt, attempted_at, accuracy, time_spent),
+        )
+
+    def attempts(self, student_id):
+        """
+        Number of recorded attempts for the student, 0 for a new student.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MAX(attempts) FROM progress_rollups WHERE student_id = ?", (int(student_id),)
+            ).fetchone()
+        return row[0] or 0
+
+    def progress(self, student_id):
+        """
+        {question_type: rollup} for the student, each with its trend since
+        the first attempt and its most recent attempts, oldest first.
+        """
+        with self._lock:
+            conn = self._connection()
+            rollups = conn.execute(
+                "SELECT question_type, attempts, first_accuracy, first_time_spent, latest_accuracy, "
+                "latest_time_spent, ema_accuracy, ema_time_spent, updated_at FROM progress_rollups "
+                "WHERE student_id = ? ORDER BY question_type",
+                (int(student_id),),
+            ).fetchall()
+            history = conn.execute(
+                "SELECT question_type, attempt, attempted_at, accuracy, time_spent FROM progress_attempts "
+                "WHERE student_id = ? AND attempt > (SELECT attempts FROM progress_rollups AS rollup "
+                "WHERE rollup.student_id = progress_attempts.student_id "
+                "AND rollup.question_type = progress_attempts.question_type) - ? "
+                "ORDER BY question_type, attempt",
+                (int(student_id), self.HISTORY_LIMIT),
+            ).fetchall()
+
+        progress = {}
+        for (question_type, attempts, first_accuracy, first_time_spent, latest_accuracy,
+             latest_time_spent, ema_accuracy, ema_time_spent, updated_at) in rollups:
+            progress[question_type] = {
+                'attempts': attempts,
+                'first': {'accuracy': first_accuracy, 'time_spent': first_time_spent},
+                'latest': {'accuracy': latest_accuracy, 'time_spent': latest_time_spent},
+                'moving_average': {'accuracy': ema_accuracy, 'time_spent': ema_time_spent},
+                'trend': {
+                    'accuracy': latest_accuracy - first_accuracy,
+                    'time_spent': latest_time_spent - first_time_spent,
+                },
+                'updated_at': updated_at,
+                'history': [],
+            }
+        for question_type, attempt, attempted_at, accuracy, time_spent in history:
+            progress[question_type]['history'].append({
+                'attempt': attempt,
+                'attempted_at': attempted_at,
+                'accuracy': accuracy,
+                'time_spent': time_spent,
+            })
+        return progress
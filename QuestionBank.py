@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from AnswerScoring import AnswerScorer
+
+
+class QuestionIndex:
+    """
+    Compiled, read-only view of one test form of a question bank.
+
+    Every question's type and time threshold sit in arrays aligned with the
+    answer scorer's question ids, so a whole submission is classified with
+    one gather through the scorer's position lookup. Built once per bank
+    version and shared by every request. Question ids must fit the int32
+    question_id column that scored rows are logged and kept in.
+    """
+    QUESTION_ID_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+    def __init__(self, questions, default_time_threshold, form=None):
+        by_id = {}
+        for question in questions:
+            if question['id'] in by_id:
+                raise ValueError(f"Duplicate question id {question['id']} in form {form!r} of the question bank")
+            if not self.QUESTION_ID_RANGE[0] <= question['id'] <= self.QUESTION_ID_RANGE[1]:
+                raise ValueError(f"Question id {question['id']} in form {form!r} is out of range")
+            by_id[question['id']] = question
+
+        self.scorer = AnswerScorer({question_id: question['answer'] for question_id, question in by_id.items()})
+        ordered = [by_id[question_id] for question_id in self.scorer.question_ids]
+        self.question_types = np.array([question['type'] for question in ordered], dtype=object)
+        self.time_thresholds = np.array(
+            [question.get('time_threshold', default_time_threshold) for question in ordered], dtype=np.float64
+        )
+        self.form = form
+        self.default_time_threshold = default_time_threshold
+        self._questions = by_id
+
+    def __contains__(self, question_id):
+        return question_id in self._questions
+
+    def __len__(self):
+        return len(self._questions)
+
+    def question(self, question_id):
+        """
+        The bank entry for one question id, or None.
+        """
+        return self._questions.get(question_id)
+
+    def answer(self, question_id):
+        question = self._questions.get(question_id)
+        return question['answer'] if question is not None else None
+
+    def question_types_for(self, question_ids):
+        """
+        Question type per id. Raises ValueError if any id is not in the bank.
+        """
+        positions = self._known_positions(question_ids)
+        return self.question_types[positions]
+
+    def time_thresholds_for(self, question_ids):
+        """
+        Time threshold per id, the bank default for ids it does not know.
+        """
+        positions = self.scorer.positions(question_ids)
+        thresholds = np.full(len(positions), self.default_time_threshold, dtype=np.float64)
+        known = positions >= 0
+        thresholds[known] = self.time_thresholds[positions[known]]
+        return thresholds
+
+    def question_ids_by_type(self):
+        grouped = {}
+        for question_id, question_type in zip(self.scorer.question_ids, self.question_types):
+            grouped.setdefault(question_type, []).append(int(question_id))
+        return grouped
+
+    def _known_positions(self, question_ids):
+        positions = self.scorer.positions(question_ids)
+        if (positions < 0).any():
+            unknown = sorted(set(np.asarray(question_ids, dtype=np.int64)[positions < 0].tolist()))
+            raise ValueError(f"Unknown question ids: {unknown}")
+        return positions
+
+
+class QuestionBank:
+    """
+    Process-wide holder for a question bank file.
+
+    The JSON file lists test forms, each with its questions (id, type,
+    answer and an optional time threshold). Question ids only need to be
+    unique within a form. Every form is compiled into its own QuestionIndex
+    once and recompiled only when the file's mtime changes, so editing the
+    bank takes effect without a restart. `default_form` names the form used
+    when a submission doesn't say, the first form if it is missing. Use
+    QuestionBank.shared(path) to share one compiled bank per process.
+    """
+    DEFAULT_TIME_THRESHOLD = 35
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.version = None
+        # ({form id: QuestionIndex}, default form id), swapped in as one
+        self._compiled = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path):
+        """
+        Return the process-wide bank for the given file.
+        """
+        key = os.path.abspath(path)
+        with cls._instances_lock:
+            bank = cls._instances.get(key)
+            if bank is None:
+                bank = cls._instances[key] = cls(key)
+            return bank
+
+    @property
+    def index(self):
+        """
+        The compiled index of the default form. Read-only, it is shared.
+        """
+        return self.form()
+
+    def form(self, form_id=None):
+        """
+        The compiled index of one test form, the default form for None.
+        Raises KeyError for a form the bank doesn't have.
+        """
+        self.refresh()
+        forms, default_form = self._compiled
+        return forms[default_form if form_id is None else form_id]
+
+    @property
+    def forms(self):
+        self.refresh()
+        return list(self._compiled[0])
+
+    @property
+    def current_version(self):
+        """
+        Content hash of the compiled bank file, checked against its mtime first.
+        """
+        self.refresh()
+        return self.version
+
+    def refresh(self):
+        """
+        Recompile the bank if the file changed on disk. Returns True on reload.
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+
+            with open(self.path, 'rb') as file:
+                content = file.read()
+            version = hashlib.sha256(content).hexdigest()
+            if version == self.version:
+                # Touched but not modified, keep the compiled index
+                self._mtime = mtime
+                return False
+
+            self._compiled = self.compile(json.loads(content))
+            self.version = version
+            self._mtime = mtime
+            return True
+
+    @classmethod
+    def compile(cls, bank):
+        """
+        ({form id: QuestionIndex}, default form id) from the parsed bank document.
+        """
+        default_time_threshold = bank.get('default_time_threshold', cls.DEFAULT_TIME_THRESHOLD)
+        forms = {}
+        for form in bank['forms']:
+            if form['id'] in forms:
+                raise ValueError(f"Duplicate form id {form['id']!r} in the question bank")
+            forms[form['id']] = QuestionIndex(form['questions'], default_time_threshold, form=form['id'])
+        if not forms:
+            raise ValueError("The question bank has no forms")
+
+        default_form = bank.get('default_form', next(iter(forms)))
+        if default_form not in forms:
+            raise ValueError(f"Default form {default_form!r} is not in the question bank")
+        return forms, default_form
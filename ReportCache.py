@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ReportCache:
+    """
+    Two-tier cache of finished report PDFs keyed on the normalized submission.
+
+    The key hashes the student identity, the cohort data version and the
+    responses after normalization: answers are compared the way the scorer
+    compares them and times are rounded to `time_bucket` seconds, so retries
+    and near-identical submissions share one report. With `time_thresholds`
+    each response also carries whether it was within its question's time
+    threshold, so two times in one bucket that are classified differently
+    never share a key. `variant` should name everything else the PDF depends
+    on, including the report format version: the disk tier outlives
+    restarts and deploys. Recent reports live in
+    an in-memory LRU of `memory_items` entries; every report is also written
+    to `disk_dir`, which is trimmed least-recently-used first to stay under
+    `disk_max_bytes`. Lookups only hash and read bytes, they never touch
+    pandas, matplotlib or ReportLab.
+    """
+
+    def __init__(self, disk_dir, memory_items=128, disk_max_bytes=256 * 1024 * 1024, time_bucket=1.0):
+        self.disk_dir = disk_dir
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self.time_bucket = time_bucket
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._disk = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, student_id, student_name, responses, cohort_version, variant='', time_thresholds=None):
+        """
+        Cache key for a submission of (question_id, time_spent, answer) tuples.
+        `time_thresholds`, if given, holds each response's time threshold in order.
+        """
+        responses = list(responses)
+        if time_thresholds is None:
+            within = [None] * len(responses)
+        else:
+            within = [bool(float(time_spent) <= threshold)
+                      for (_, time_spent, _), threshold in zip(responses, time_thresholds)]
+        normalized = sorted(
+            (int(question_id), self._bucket(time_spent), in_time, self._normalize_answer(answer))
+            for (question_id, time_spent, answer), in_time in zip(responses, within)
+        )
+        payload = json.dumps([str(student_id), str(student_name), cohort_version, variant, normalized],
+                             separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        The cached PDF bytes, or None on a miss.
+        """
+        with self._lock:
+            pdf_bytes = self._memory.get(key)
+            if pdf_bytes is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return pdf_bytes
+
+            self._load_disk_index()
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                pdf_bytes = file.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget_disk(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits_disk += 1
+            self._remember(key, pdf_bytes)
+        return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(pdf_bytes)
+        os.replace(tmp_path, self._path(key))
+
+        with self._lock:
+            self._remember(key, pdf_bytes)
+            self._load_disk_index()
+            self._forget_disk(key)
+            self._disk[key] = len(pdf_bytes)
+            self._disk_bytes += len(pdf_bytes)
+            self._evict_disk()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits_memory': self.hits_memory,
+                'hits_disk': self.hits_disk,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'memory_items': len(self._memory),
+                'disk_items': len(self._disk) if self._disk is not None else 0,
+                'disk_bytes': self._disk_bytes,
+            }
+
+    def _bucket(self, time_spent):
+        return round(float(time_spent) / self.time_bucket)
+
+    @staticmethod
+    def _normalize_answer(answer):
+        # Mirrors the scorer: anything float() accepts is compared as a number
+        try:
+            return repr(float(answer))
+        except (ValueError, TypeError):
+            return str(answer).strip().lower()
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pdf")
+
+    def _remember(self, key, pdf_bytes):
+        self._memory[key] = pdf_bytes
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _load_disk_index(self):
+        # Index whatever an earlier process left behind, oldest access first
+        if self._disk is not None:
+            return
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        if not os.path.isdir(self.disk_dir):
+            return
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pdf'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _forget_disk(self, key):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
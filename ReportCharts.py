@@ -0,0 +1,102 @@
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+# matplotlib's default colour cycle, so both chart backends look alike
+SERIES_COLORS = [colors.HexColor(value) for value in (
+    '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b',
+)]
+
+WIDTH = 3 * inch
+HEIGHT = 2 * inch
+
+
+def _bar_chart(values, categories, value_max=None):
+    chart = VerticalBarChart()
+    chart.x = 28
+    chart.y = 22
+    chart.width = WIDTH - 80
+    chart.height = HEIGHT - 48
+    chart.data = [values]
+    chart.categoryAxis.categoryNames = categories
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 5
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 5
+    chart.valueAxis.valueMin = 0
+    if value_max is not None:
+        chart.valueAxis.valueMax = value_max
+    chart.bars.strokeWidth = 0
+    chart.barSpacing = 1
+    return chart
+
+
+def _add_legend(drawing, title, color_name_pairs):
+    drawing.add(String(WIDTH - 48, HEIGHT - 22, title, fontName='Helvetica-Bold', fontSize=5))
+    legend = Legend()
+    legend.x = WIDTH - 48
+    legend.y = HEIGHT - 26
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 5
+    legend.boxAnchor = 'nw'
+    legend.alignment = 'right'
+    legend.dx = 5
+    legend.dy = 5
+    legend.deltay = 7
+    legend.columnMaximum = 8
+    legend.colorNamePairs = color_name_pairs
+    drawing.add(legend)
+
+
+def time_spent_chart(student_df, student_name):
+    """
+    Vector version of UnifiedStudentPerformanceReport.visualize_time_spent:
+    one bar per question, coloured by question type.
+    """
+    rows = student_df.sort_values('question_id')
+    question_types = list(dict.fromkeys(student_df['question_type']))
+    type_colors = {
+        question_type: SERIES_COLORS[index % len(SERIES_COLORS)].clone(alpha=0.7)
+        for index, question_type in enumerate(question_types)
+    }
+
+    drawing = Drawing(WIDTH, HEIGHT)
+    drawing.add(String(WIDTH / 2, HEIGHT - 10, f"Time Spent on Each Question by {student_name}",
+                       fontName='Helvetica-Bold', fontSize=7, textAnchor='middle'))
+    drawing.add(String(WIDTH / 2 - 20, 3, "Question ID", fontName='Helvetica', fontSize=6, textAnchor='middle'))
+    drawing.add(String(4, HEIGHT - 18, "Time Spent (seconds)", fontName='Helvetica', fontSize=6))
+
+    chart = _bar_chart([float(value) for value in rows['time_spent']], [str(value) for value in rows['question_id']])
+    for index, question_type in enumerate(rows['question_type']):
+        chart.bars[(0, index)].fillColor = type_colors[question_type]
+    drawing.add(chart)
+
+    _add_legend(drawing, "Question Type", [(type_colors[question_type], question_type) for question_type in question_types])
+    return drawing
+
+
+def average_scores_chart(average_scores):
+    """
+    Vector version of visualize_average_scores_with_clusters: average score
+    per question type out of 5, coloured by cluster.
+    """
+    clusters = sorted(set(int(cluster) for cluster in average_scores['cluster']))
+    cluster_colors = {cluster: SERIES_COLORS[index % len(SERIES_COLORS)] for index, cluster in enumerate(clusters)}
+
+    drawing = Drawing(WIDTH, HEIGHT)
+    drawing.add(String(WIDTH / 2, HEIGHT - 10, "Average Student Performance",
+                       fontName='Helvetica-Bold', fontSize=7, textAnchor='middle'))
+    drawing.add(String(WIDTH / 2 - 20, 3, "Question Type", fontName='Helvetica', fontSize=6, textAnchor='middle'))
+    drawing.add(String(4, HEIGHT - 18, "Average Score Obtained (Out of 5)", fontName='Helvetica', fontSize=6))
+
+    chart = _bar_chart([float(value) for value in average_scores['accuracy']],
+                       [str(value) for value in average_scores['question_type']], value_max=5)
+    chart.valueAxis.valueStep = 1
+    for index, cluster in enumerate(average_scores['cluster']):
+        chart.bars[(0, index)].fillColor = cluster_colors[int(cluster)]
+    drawing.add(chart)
+
+    _add_legend(drawing, "Clusters", [(cluster_colors[cluster], f"Cluster {cluster + 1}") for cluster in clusters])
+    return drawing
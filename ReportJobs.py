@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ReportJobQueue:
+    """
+    Report job queue backed by a bounded worker pool and a shared job table.
+
+    submit() returns a job id straight away, the work runs on this process's
+    pool and status() reports queued/running/done/failed. Job records live
+    in a local SQLite file rather than in memory, so under a pre-forking
+    server any worker can answer a status poll for a job another worker
+    accepted. A job still queued or running after `timeout` seconds is
+    reported as failed, e.g. when the worker running it was killed. Jobs
+    submitted with a `job_key` are coalesced: while one is queued or
+    running, any process submitting the same key gets its id back. The
+    executor and the connection are only created on first use, so the
+    queue is safe to build before a fork.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL UNIQUE,
+            job_key TEXT,
+            status TEXT NOT NULL,
+            submitted_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            result TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS report_jobs_key ON report_jobs (job_key, status);
+    """
+
+    def __init__(self, path, max_workers=2, max_jobs=1000, timeout=600):
+        self.path = os.path.abspath(path)
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._executor = None
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Opened on first use, and again in a forked child: SQLite handles must not cross a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def close(self):
+        """
+        Close this process's connection, e.g. before forking. The next call reopens it.
+        """
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._conn_pid = None
+
+    def submit(self, func, *args, job_key=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) and return the new job id, or the id of
+        the unfinished job already submitted with the same `job_key`.
+        """
+        job_id, created = self._insert(self.QUEUED, job_key=job_key)
+        if not created:
+            return job_id
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report-job')
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def add_completed(self, result):
+        """
+        Record a job whose result is already known (e.g. a cache hit) and return its id.
+        """
+        return self._insert(self.DONE, result=result)[0]
+
+    def status(self, job_id):
+        """
+        A copy of the job record, or None for an unknown job id.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT status, submitted_at, started_at, finished_at, result, error FROM report_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, submitted_at, started_at, finished_at, result, error = row
+        if status in (self.QUEUED, self.RUNNING) and time.time() - submitted_at > self.timeout:
+            status, error = self.FAILED, "Report job timed out"
+        return {
+            'job_id': job_id,
+            'status': status,
+            'submitted_at': submitted_at,
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'result': result,
+            'error': error,
+        }
+
+    def _insert(self, status, result=None, job_key=None):
+        # (job id, True) for a new job, (job id, False) for an unfinished one with the same key
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if job_key is not None:
+                    # Holds the write lock from the lookup to the insert, so two processes can't both insert
+                    conn.execute("BEGIN IMMEDIATE")
+                    running = conn.execute(
+                        "SELECT job_id FROM report_jobs WHERE job_key = ? AND status IN (?, ?) AND submitted_at >= ? "
+                        "ORDER BY id DESC LIMIT 1",
+                        (job_key, self.QUEUED, self.RUNNING, now - self.timeout),
+                    ).fetchone()
+                    if running is not None:
+                        return running[0], False
+                cursor = conn.execute(
+                    "INSERT INTO report_jobs (job_id, job_key, status, submitted_at, finished_at, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, job_key, status, now, now if status == self.DONE else None, result),
+                )
+                # Forget the oldest finished jobs once the table is full
+                conn.execute(
+                    "DELETE FROM report_jobs WHERE id <= ? AND status IN (?, ?)",
+                    (cursor.lastrowid - self.max_jobs, self.DONE, self.FAILED),
+                )
+        return job_id, True
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status=self.RUNNING, started_at=time.time())
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            self._update(job_id, status=self.FAILED, error=str(error), finished_at=time.time())
+        else:
+            self._update(job_id, status=self.DONE, result=result, finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE report_jobs SET " + ', '.join(f"{name} = ?" for name in fields) + " WHERE job_id = ?",
+                    (*fields.values(), job_id),
+                )
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+
+class ReportStore:
+    """
+    Storage for finished PDF reports, addressed by the submission they report on.
+
+    Each report is saved as <key>.pdf, where the key combines the student id
+    with a hash of the student id and the submission's key (the normalized
+    submission the report cache uses), not of the PDF bytes, which differ
+    on every build. Rebuilding the same submission therefore reuses its
+    file, and concurrent writers never collide. Class batches are stored the
+    same way as <key>.zip, with keys that start with 'class_' instead of
+    'report_'. Files older than `max_age` seconds are removed, checked at
+    most every `prune_interval` seconds when a report is stored; a stored
+    report past half its age is rewritten instead of reused, so a key handed
+    out is always good for at least max_age / 2.
+    """
+    KEY_PATTERN = re.compile(r'^(report|class)_[A-Za-z0-9-]+_[0-9a-f]{32}$')
+    EXTENSIONS = {'report': 'pdf', 'class': 'zip'}
+    MIMETYPES = {'pdf': 'application/pdf', 'zip': 'application/zip'}
+    MAX_AGE = 30 * 24 * 3600
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, root, max_age=None, prune_interval=None):
+        self.root = root
+        self.max_age = self.MAX_AGE if max_age is None else max_age
+        self.prune_interval = self.PRUNE_INTERVAL if prune_interval is None else prune_interval
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(student_id, submission_key, kind='report'):
+        digest = hashlib.sha256()
+        digest.update(str(student_id).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(submission_key.encode('utf-8'))
+        safe_id = re.sub(r'[^A-Za-z0-9-]', '-', str(student_id))
+        return f"{kind}_{safe_id}_{digest.hexdigest()[:32]}"
+
+    @classmethod
+    def extension(cls, key):
+        return cls.EXTENSIONS[key.split('_', 1)[0]]
+
+    @classmethod
+    def filename(cls, key):
+        return f"{key}.{cls.extension(key)}"
+
+    @classmethod
+    def mimetype(cls, key):
+        return cls.MIMETYPES[cls.extension(key)]
+
+    def path(self, key):
+        return os.path.join(self.root, self.filename(key))
+
+    def put(self, student_id, pdf_bytes, submission_key, kind='report'):
+        """
+        Store the report on a submission (or a class archive, kind='class')
+        unless it is already stored, and return its key.
+        """
+        self.maybe_prune()
+        key = self.key_for(student_id, submission_key, kind)
+        path = self.path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime < self.max_age / 2:
+                return key
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(self.root, exist_ok=True)
+        # Write to a private temp file first so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(pdf_bytes)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    @classmethod
+    def key_from_filename(cls, filename):
+        """
+        The report key for a <key>.pdf (or class <key>.zip) file name, or
+        None if it isn't one.
+        """
+        key, _, extension = filename.rpartition('.')
+        if not cls.KEY_PATTERN.match(key) or cls.extension(key) != extension:
+            return None
+        return key
+
+    def etag(self, key):
+        """
+        Strong validator for a stored report. A stored file is only ever
+        replaced whole, so its key and write time identify its bytes and
+        the file need not be read.
+        """
+        return f"{key.rsplit('_', 1)[-1]}-{os.stat(self.path(key)).st_mtime_ns:x}"
+
+    def exists(self, key):
+        return bool(self.KEY_PATTERN.match(key)) and os.path.exists(self.path(key))
+
+    def maybe_prune(self):
+        """
+        prune() if it hasn't run in this process for `prune_interval` seconds.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._pruned_at < self.prune_interval:
+                return 0
+            self._pruned_at = now
+        return self.prune()
+
+    def prune(self):
+        """
+        Remove stored reports (and abandoned temp files) older than max_age. Returns the number removed.
+        """
+        removed = 0
+        cutoff = time.time() - self.max_age
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            key, _, extension = entry.name.rpartition('.')
+            if not (self.KEY_PATTERN.match(key) or extension == 'tmp'):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
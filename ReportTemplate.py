@@ -0,0 +1,187 @@
+import threading
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, TableStyle
+
+from Metrics import METRICS
+
+
+class ReportTemplate:
+    """
+    The static parts of the performance report, built once per process.
+
+    Styles and table styles are read-only and shared by every build. The
+    page template and the boilerplate paragraphs hold layout state while a
+    document is being built, so each thread gets its own copy, created on
+    first use and reused for every later report on that thread.
+    """
+    PAGE_SIZE = letter
+    MARGIN = 72
+
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+
+        # Define custom styles with Times-Roman font and bold headings
+        self.styles.add(ParagraphStyle(
+            name='TitleStyle',
+            parent=self.styles['Title'],
+            fontName='Times-Roman',
+            alignment=TA_CENTER,
+            fontSize=18,
+            spaceAfter=20,
+            textColor=colors.black
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='NormalStyle',
+            parent=self.styles['Normal'],
+            fontName='Times-Roman',
+            fontSize=12,
+            leading=15,
+            alignment=TA_LEFT
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='SubtitleStyle',
+            parent=self.styles['Heading2'],
+            fontName='Times-Roman',
+            alignment=TA_LEFT,
+            spaceAfter=10,
+            spaceBefore=20,
+            fontSize=14,
+            textColor=colors.black,
+            bold=True  # Make subtitles bold
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='BulletStyle',
+            parent=self.styles['Normal'],
+            fontName='Times-Roman',
+            leftIndent=20,
+            bulletIndent=10,
+            spaceAfter=5,
+            bulletFontName='Times-Roman'
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='NormalStyleTimesRoman',
+            fontName='Times-Roman',
+            fontSize=10,  # Adjust the font size as needed
+            leading=15,   # Adjust line spacing as needed
+            alignment=TA_LEFT
+        ))
+
+        self.score_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#4F81BD")),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Times-Roman'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor("#DCE6F1")),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),  # Add grid borders
+            ('BORDER', (0, 0), (-1, -1), 1, colors.black)  # Add border around the table
+        ])
+
+        self.graphs_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 12),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+            ('BORDER', (0, 0), (-1, -1), 1, colors.black)  # Add border around graph table
+        ])
+
+        self._local = threading.local()
+
+    @property
+    def static(self):
+        """
+        This thread's boilerplate paragraphs, keyed by name.
+        """
+        paragraphs = getattr(self._local, 'paragraphs', None)
+        if paragraphs is None:
+            paragraphs = self._local.paragraphs = {
+                'title': Paragraph("<b>Performance Report</b>", self.styles['TitleStyle']),
+                'scores_heading': Paragraph("<b>Scores by Question Type:</b>", self.styles['SubtitleStyle']),
+                'percentiles_heading': Paragraph("<b>Compared with Other Students:</b>", self.styles['SubtitleStyle']),
+                'progress_heading': Paragraph("<b>Progress Over Time:</b>", self.styles['SubtitleStyle']),
+                'recommendations_heading': Paragraph("<b>Recommendations</b>", self.styles['SubtitleStyle']),
+                'visualizations_heading': Paragraph("<b>Performance Visualizations:</b>", self.styles['SubtitleStyle']),
+                'visualizations_note': Paragraph(
+                    "The visualizations provided above offer a detailed overview of your child's performance. "
+                    "These insights will help you better understand key areas of strength and opportunities for improvement. "
+                    "Thank you for your attention.",
+                    self.styles['NormalStyleTimesRoman']
+                ),
+                'graphs_missing': Paragraph("Graphs not found.", self.styles['NormalStyle']),
+            }
+        return paragraphs
+
+    def _page_template(self):
+        template = getattr(self._local, 'page_template', None)
+        if template is None:
+            width = self.PAGE_SIZE[0] - 2 * self.MARGIN
+            height = self.PAGE_SIZE[1] - 2 * self.MARGIN
+            frame = Frame(self.MARGIN, self.MARGIN, width, height, id='normal')
+            template = self._local.page_template = PageTemplate(
+                id='header_footer',
+                frames=frame,
+                onPageEnd=self.footer
+            )
+        return template
+
+    @staticmethod
+    def footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Times-Roman', 10)
+
+        # Get current date and time
+        current_datetime = datetime.now().strftime("%B %d, %Y %I:%M %p")
+
+        # Create footer text
+        footer_text = f"Generated by AI - {current_datetime}"
+
+        canvas.setFillColor(colors.black)
+        canvas.drawCentredString(
+            ReportTemplate.PAGE_SIZE[0] / 2.0,
+            0.75 * inch,
+            footer_text
+        )
+        canvas.restoreState()
+
+    def build(self, output, elements):
+        """
+        Lay out the given flowables onto the report pages and write the PDF to output.
+        """
+        doc = BaseDocTemplate(
+            output,
+            pagesize=self.PAGE_SIZE,
+            rightMargin=self.MARGIN,
+            leftMargin=self.MARGIN,
+            topMargin=self.MARGIN,
+            bottomMargin=self.MARGIN,
+            pageTemplates=[self._page_template()],
+        )
+        with METRICS.timer('doc_build'):
+            doc.build(elements)
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_report_template():
+    """
+    The process-wide ReportTemplate, built on first use.
+    """
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = ReportTemplate()
+    return _template
@@ -0,0 +1,236 @@
+"""
+Student-level performance clustering, trained offline and predicted in-process.
+
+Usage:
+    python StudentClustering.py classified_student_data.csv --output student_clusters.npz
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+class StudentClusterModel:
+    """
+    A fitted scaler plus cluster centres over per-student features.
+
+    Features are the mean accuracy and mean time per question for every
+    question type. Everything is stored as plain arrays, so predict() is a
+    few NumPy operations on one vector (no scikit-learn at request time),
+    and save()/load() use a single .npz file. Clusters are ordered by
+    centroid accuracy, best first, and named with `labels` in that order.
+    """
+
+    def __init__(self, question_types, mean, scale, centers, labels, n_students=0, trained_at=None):
+        self.question_types = list(question_types)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.labels = list(labels)
+        self.n_students = n_students
+        self.trained_at = time.time() if trained_at is None else trained_at
+
+    @staticmethod
+    def features(data, question_types=None):
+        """
+        (student ids, feature matrix) with accuracy then time columns per
+        question type. Types a student never answered get the cohort mean.
+        """
+        grouped = data.groupby(['student_id', 'question_type'], observed=True).agg(
+            accuracy=('accuracy', 'mean'),
+            time_spent=('time_spent', 'mean'),
+        ).unstack('question_type')
+        if question_types is None:
+            question_types = sorted(str(question_type) for question_type in grouped.columns.get_level_values(1).unique())
+        grouped.columns = [(name, str(question_type)) for name, question_type in grouped.columns]
+        columns = [('accuracy', question_type) for question_type in question_types] + \
+                  [('time_spent', question_type) for question_type in question_types]
+        matrix = grouped.reindex(columns=columns).to_numpy(dtype=np.float64)
+        return grouped.index.to_numpy(), matrix, question_types
+
+    @classmethod
+    def train(cls, data, labels, seed=0, batch_size=1024):
+        """
+        Fit a StandardScaler and MiniBatchKMeans on the cohort's students.
+        """
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.preprocessing import StandardScaler
+
+        _, matrix, question_types = cls.features(data)
+        column_means = np.nanmean(matrix, axis=0)
+        matrix = np.where(np.isnan(matrix), column_means, matrix)
+
+        scaler = StandardScaler().fit(matrix)
+        n_clusters = min(len(labels), len(matrix))
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, batch_size=batch_size, n_init=3)
+        kmeans.fit(scaler.transform(matrix))
+
+        # Order clusters by mean centroid accuracy in original units, best first
+        centers = kmeans.cluster_centers_
+        accuracy = (centers * scaler.scale_ + scaler.mean_)[:, :len(question_types)].mean(axis=1)
+        centers = centers[np.argsort(-accuracy)]
+
+        return cls(question_types, scaler.mean_, scaler.scale_, centers, labels[:n_clusters], n_students=len(matrix))
+
+    def predict(self, features):
+        """
+        Index of the nearest cluster for one feature vector.
+        """
+        scaled = (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+        return int(np.argmin(((self.centers - scaled) ** 2).sum(axis=1)))
+
+    def predict_rows(self, scored_rows):
+        """
+        Cluster label for one student's scored rows.
+        """
+        # A handful of rows, masks are much cheaper than a groupby here
+        question_types = np.asarray(scored_rows['question_type'], dtype=object)
+        accuracy = scored_rows['accuracy'].to_numpy(dtype=np.float64)
+        time_spent = scored_rows['time_spent'].to_numpy(dtype=np.float64)
+
+        # Question types this student skipped count as average
+        features = self.mean.copy()
+        n_types = len(self.question_types)
+        for position, question_type in enumerate(self.question_types):
+            mask = question_types == question_type
+            if mask.any():
+                features[position] = accuracy[mask].mean()
+                features[n_types + position] = time_spent[mask].mean()
+        return self.labels[self.predict(features)]
+
+    def save(self, path):
+        # Written next to the target and swapped in, so readers never see half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            question_types=np.array(self.question_types),
+            mean=self.mean,
+            scale=self.scale,
+            centers=self.centers,
+            labels=np.array(self.labels),
+            n_students=self.n_students,
+            trained_at=self.trained_at,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as saved:
+            return cls(
+                saved['question_types'].tolist(),
+                saved['mean'],
+                saved['scale'],
+                saved['centers'],
+                saved['labels'].tolist(),
+                n_students=int(saved['n_students']),
+                trained_at=float(saved['trained_at']),
+            )
+
+
+class StudentClustering:
+    """
+    Process-wide access to the saved model, with scheduled retraining.
+
+    The model file is loaded once and reloaded only when its mtime changes
+    (another process retrained it). If no model has been saved yet, one is
+    trained from the cohort on first use. maybe_retrain() retrains on a
+    background thread once the model is older than `retrain_interval`
+    seconds or the cohort has grown by `retrain_growth` since it was fitted.
+    """
+    RETRAIN_INTERVAL = 6 * 3600
+    RETRAIN_GROWTH = 0.1
+
+    def __init__(self, path, cohort_store, labels, retrain_interval=None, retrain_growth=None):
+        self.path = os.path.abspath(path)
+        self.cohort_store = cohort_store
+        self.labels = list(labels)
+        self.retrain_interval = self.RETRAIN_INTERVAL if retrain_interval is None else retrain_interval
+        self.retrain_growth = self.RETRAIN_GROWTH if retrain_growth is None else retrain_growth
+        self._model = None
+        self._mtime = None
+        self._retraining = False
+        self._cohort_students = (None, 0)
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime != self._mtime or self._model is None:
+            with self._lock:
+                if mtime is None:
+                    if self._model is None:
+                        self._model = self.retrain()
+                elif mtime != self._mtime:
+                    self._model = StudentClusterModel.load(self.path)
+                    self._mtime = mtime
+        return self._model
+
+    def retrain(self):
+        """
+        Train on the current cohort and save the model. Returns the new model.
+        """
+        model = StudentClusterModel.train(self.cohort_store.data, self.labels)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        model.save(self.path)
+        return model
+
+    def is_stale(self):
+        model = self.model
+        if time.time() - model.trained_at >= self.retrain_interval:
+            return True
+        # Counted once per cohort version, not on every check
+        version = self.cohort_store.current_version
+        if version != self._cohort_students[0]:
+            self._cohort_students = (version, self.cohort_store.data['student_id'].nunique())
+        n_students = self._cohort_students[1]
+        return n_students >= model.n_students * (1 + self.retrain_growth)
+
+    def maybe_retrain(self):
+        """
+        Retrain in the background if the model is stale. Returns True if started.
+        """
+        if self._retraining or not self.is_stale():
+            return False
+        with self._lock:
+            if self._retraining:
+                return False
+            self._retraining = True
+
+        def retrain():
+            try:
+                self.retrain()
+            finally:
+                self._retraining = False
+
+        # Started on demand, so nothing is running in a process that later forks
+        threading.Thread(target=retrain, name='student-clustering', daemon=True).start()
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the student clustering model offline.")
+    parser.add_argument('cohort_file', help="Cohort CSV with student_id, question_type, time_spent and accuracy")
+    parser.add_argument('--output', default='student_clusters.npz')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from CohortStore import CohortStore
+    from EvaluationHandler import UnifiedStudentPerformanceReport
+
+    labels = [UnifiedStudentPerformanceReport.CLUSTER_LABELS[index] for index in sorted(UnifiedStudentPerformanceReport.CLUSTER_LABELS)]
+    started = time.perf_counter()
+    model = StudentClusterModel.train(CohortStore(args.cohort_file).data, labels, seed=args.seed)
+    model.save(args.output)
+    print(f"Trained on {model.n_students} students in {time.perf_counter() - started:.1f}s, saved to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import queue
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+StudentCredentials = namedtuple('StudentCredentials', ['id', 'name', 'password_hash'])
+
+
+class PoolExhausted(Exception):
+    """Raised when no database connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded pool of DB-API connections.
+
+    At most `max_size` connections are ever checked out at once. Connections
+    are opened lazily on first use (so a pool built before a fork holds no
+    sockets) and are always returned, committed on success and rolled back
+    on error. A connection that cannot be rolled back is closed and dropped.
+
+    With a `ping` callable, an idle connection is checked before it is handed
+    out; one the server has dropped (e.g. after MySQL's wait_timeout) is
+    closed and replaced with a fresh connection.
+    """
+
+    def __init__(self, connect, max_size=5, timeout=10.0, ping=None):
+        self._connect = connect
+        self._ping = ping
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.max_size = max_size
+        self.timeout = timeout
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(f"No database connection free after {self.timeout}s")
+
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+            conn.commit()
+        except BaseException:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    self._discard(conn)
+                    conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._ping is None:
+                return conn
+            try:
+                self._ping(conn)
+                return conn
+            except Exception:
+                # Gone stale while idle, try the next one
+                self._discard(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class StudentRepository:
+    """
+    Data access for the students table. Only the columns a caller needs are
+    selected and every cursor and connection is released on all paths.
+    Subclasses provide the connection factory and parameter placeholder.
+    """
+    PLACEHOLDER = '%s'
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def get_credentials(self, email):
+        """
+        (id, name, password_hash) for the student with this email, or None.
+        """
+        row = self._fetchone(f"SELECT id, name, password FROM students WHERE email = {self.PLACEHOLDER}", (email,))
+        return StudentCredentials(*row) if row is not None else None
+
+    def email_exists(self, email):
+        return self._fetchone(f"SELECT 1 FROM students WHERE email = {self.PLACEHOLDER}", (email,)) is not None
+
+    def create(self, name, age, email, password_hash):
+        placeholders = ', '.join([self.PLACEHOLDER] * 4)
+        self._execute(f"INSERT INTO students (name, age, email, password) VALUES ({placeholders})",
+                      (name, age, email, password_hash))
+
+    def update_password(self, email, password_hash):
+        """
+        Returns True if a student with this email was updated.
+        """
+        return self._execute(
+            f"UPDATE students SET password = {self.PLACEHOLDER} WHERE email = {self.PLACEHOLDER}",
+            (password_hash, email),
+        ) > 0
+
+    def _fetchone(self, sql, params):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(sql, params)
+                return cur.fetchone()
+            finally:
+                cur.close()
+
+    def _execute(self, sql, params):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(sql, params)
+                return cur.rowcount
+            finally:
+                cur.close()
+
+
+class MySQLStudentRepository(StudentRepository):
+    PLACEHOLDER = '%s'
+
+    def __init__(self, host, user, password, database, pool_size=5):
+        def connect():
+            import MySQLdb  # mysqlclient, only needed for the MySQL backend
+            return MySQLdb.connect(host=host, user=user, passwd=password, db=database, charset='utf8mb4')
+
+        # Raises OperationalError once the server has closed an idle connection
+        super().__init__(ConnectionPool(connect, max_size=pool_size, ping=lambda conn: conn.ping()))
+
+
+class SQLiteStudentRepository(StudentRepository):
+    """
+    Same interface backed by a local SQLite file, for running and load
+    testing the app without a MySQL server.
+    """
+    PLACEHOLDER = '?'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER,
+            email TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL
+        )
+    """
+
+    def __init__(self, path, pool_size=5):
+        def connect():
+            # Pooled connections move between request threads, one at a time
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SQLiteStudentRepository.SCHEMA)
+            return conn
+
+        super().__init__(ConnectionPool(connect, max_size=pool_size))
+
+
+def create_student_repository(config):
+    """
+    Build the repository selected by config['STUDENTS_DB_BACKEND'] ('mysql' or 'sqlite').
+    """
+    backend = config.get('STUDENTS_DB_BACKEND', 'mysql')
+    pool_size = int(config.get('DB_POOL_SIZE', 5))
+    if backend == 'sqlite':
+        return SQLiteStudentRepository(config.get('SQLITE_PATH', 'countbuddy.sqlite3'), pool_size=pool_size)
+    if backend == 'mysql':
+        return MySQLStudentRepository(
+            config['MYSQL_HOST'], config['MYSQL_USER'], config['MYSQL_PASSWORD'], config['MYSQL_DB'],
+            pool_size=pool_size,
+        )
+    raise ValueError(f"Unknown STUDENTS_DB_BACKEND: {backend}")
@@ -0,0 +1,276 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+
+class SubmissionLog:
+    """
+    Durable, append-only log of scored submissions with columnar snapshots.
+
+    Every scored row is appended to a local SQLite file. compact() writes
+    the rows added since the last compaction to a new Arrow IPC segment in
+    `snapshot_dir`, named after the range of log ids it holds, so a
+    compaction costs the pending rows rather than the whole history. Like
+    an LSM tree, the newest segment is merged into the one before it while
+    it is at least as large, which keeps O(log n) segments and rewrites
+    each row O(log n) times in total. Readers memory-map the segments, but
+    snapshot_frame() still copies them into one pandas frame, so loading
+    the cohort costs all logged rows. Snapshots need pyarrow; without it
+    the log still records everything and pending_frame() simply covers all
+    rows.
+    """
+    COLUMNS = ['student_id', 'student_name', 'question_id', 'question_type',
+               'time_spent', 'accuracy', 'performance_category']
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS submission_rows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id TEXT NOT NULL,
+            submitted_at REAL NOT NULL,
+            student_id INTEGER NOT NULL,
+            student_name TEXT,
+            question_id INTEGER NOT NULL,
+            question_type TEXT NOT NULL,
+            time_spent REAL NOT NULL,
+            accuracy INTEGER NOT NULL,
+            performance_category TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS submission_rows_student ON submission_rows (student_id, id);
+    """
+
+    SEGMENT_PATTERN = re.compile(r'^(\d+)-(\d+)\.arrow$')
+
+    def __init__(self, path, snapshot_dir=None, compact_every=5000):
+        self.path = os.path.abspath(path)
+        self.snapshot_dir = os.path.abspath(snapshot_dir or os.path.splitext(path)[0] + '.snapshot')
+        self.compact_every = compact_every
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Opened on first use, and again in a forked child: SQLite handles must not cross a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def close(self):
+        """
+        Close this process's connection, e.g. before forking. The next call reopens it.
+        """
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._conn_pid = None
+
+    def append(self, scored_rows, submission_id=None):
+        """
+        Append one submission's scored rows and return its submission id.
+        """
+        submission_id = submission_id or uuid.uuid4().hex
+        submitted_at = time.time()
+        rows = [
+            (submission_id, submitted_at, int(row.student_id), str(row.student_name), int(row.question_id),
+             str(row.question_type), float(row.time_spent), int(row.accuracy), str(row.performance_category))
+            for row in scored_rows[self.COLUMNS].itertuples(index=False)
+        ]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO submission_rows (submission_id, submitted_at, " + ', '.join(self.COLUMNS) + ") "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return submission_id
+
+    def snapshot_watermark(self):
+        """
+        Id of the last log row folded into the snapshot, 0 if there is none.
+        """
+        segments = self._segments()
+        return segments[-1][1] if segments else 0
+
+    def snapshot_mtime(self):
+        # Segments are only ever added or removed, which is what the directory mtime tracks
+        try:
+            return os.stat(self.snapshot_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def snapshot_frame(self):
+        """
+        Every compacted row as one frame, copied out of the mapped segments.
+        """
+        table = self._read_snapshot()
+        if table is None:
+            return pd.DataFrame(columns=self.COLUMNS)
+        # Strings come out categorical, like the cohort columns they are appended to
+        return table.to_pandas(strings_to_categorical=True)
+
+    def pending_frame(self):
+        """
+        Rows logged after the snapshot watermark.
+        """
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT " + ', '.join(self.COLUMNS) + " FROM submission_rows WHERE id > ? ORDER BY id",
+                self._connection(), params=(self.snapshot_watermark(),),
+            )
+
+    def latest_submission(self, student_id):
+        """
+        Rows of the student's most recent submission, empty if there is none.
+        """
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT " + ', '.join(self.COLUMNS) + " FROM submission_rows WHERE submission_id = ("
+                "SELECT submission_id FROM submission_rows WHERE student_id = ? ORDER BY id DESC LIMIT 1"
+                ") ORDER BY id",
+                self._connection(), params=(int(student_id),),
+            )
+
+    def pending_count(self):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM submission_rows WHERE id > ?", (self.snapshot_watermark(),)
+            ).fetchone()[0]
+
+    def maybe_compact(self):
+        """
+        Compact once enough rows are pending. Returns the number of rows folded in.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return 0
+        if self.pending_count() < self.compact_every:
+            return 0
+        return self.compact()
+
+    def compact(self):
+        """
+        Write every pending row to a new snapshot segment, then merge
+        segments as needed. Returns the number of rows written.
+        """
+        import pyarrow as pa
+
+        with self._lock:
+            conn = self._connection()
+            # BEGIN IMMEDIATE also keeps other processes from compacting at the same time
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                segments = self._segments()
+                watermark = segments[-1][1] if segments else 0
+                rows = pd.read_sql_query(
+                    "SELECT id, " + ', '.join(self.COLUMNS) + " FROM submission_rows WHERE id > ? ORDER BY id",
+                    conn, params=(watermark,),
+                )
+                if rows.empty:
+                    return 0
+
+                schema = self._arrow_schema(pa)
+                segment = (watermark + 1, int(rows['id'].iloc[-1]))
+                self._write_segment(pa, segment, pa.Table.from_pandas(rows[self.COLUMNS], schema=schema,
+                                                                      preserve_index=False))
+                segments.append(segment)
+
+                # Merge the newest segment down while it is at least as large as the one before it
+                while len(segments) > 1 and segments[-1][1] - segments[-1][0] >= segments[-2][1] - segments[-2][0]:
+                    older, newer = segments[-2], segments.pop()
+                    merged = (older[0], newer[1])
+                    self._write_segment(pa, merged, pa.concat_tables(
+                        [self._open_segment(pa, older).cast(schema), self._open_segment(pa, newer).cast(schema)]
+                    ))
+                    segments[-1] = merged
+                self._remove_covered(segments)
+                return len(rows)
+            finally:
+                conn.rollback()
+
+    @staticmethod
+    def _arrow_schema(pa):
+        return pa.schema([
+            ('student_id', pa.int32()),
+            ('student_name', pa.string()),
+            ('question_id', pa.int32()),
+            ('question_type', pa.string()),
+            ('time_spent', pa.float32()),
+            ('accuracy', pa.int8()),
+            ('performance_category', pa.string()),
+        ])
+
+    def _segment_path(self, segment):
+        return os.path.join(self.snapshot_dir, f"{segment[0]:012d}-{segment[1]:012d}.arrow")
+
+    def _segments(self):
+        """
+        (first id, last id) of the segments covering the snapshot, oldest first.
+        """
+        try:
+            import pyarrow  # noqa: F401
+            names = os.listdir(self.snapshot_dir)
+        except (ImportError, FileNotFoundError):
+            return []
+        found = sorted(
+            ((int(match.group(1)), int(match.group(2))) for match in map(self.SEGMENT_PATTERN.match, names) if match),
+            key=lambda segment: (segment[0], -segment[1]),
+        )
+        # A merged segment is written before its parts are removed, the widest one wins
+        segments = []
+        for segment in found:
+            if not segments or segment[0] > segments[-1][1]:
+                segments.append(segment)
+        return segments
+
+    def _open_segment(self, pa, segment):
+        import pyarrow.ipc
+        # Memory-mapped and uncompressed, so the columns are read without copying
+        return pa.ipc.open_file(pa.memory_map(self._segment_path(segment))).read_all()
+
+    def _write_segment(self, pa, segment, table):
+        import pyarrow.ipc
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self._segment_path(segment)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _remove_covered(self, segments):
+        keep = {os.path.basename(self._segment_path(segment)) for segment in segments}
+        for name in os.listdir(self.snapshot_dir):
+            if self.SEGMENT_PATTERN.match(name) and name not in keep:
+                try:
+                    os.remove(os.path.join(self.snapshot_dir, name))
+                except OSError:
+                    # Still mapped somewhere on a platform that refuses, the next compaction retries
+                    pass
+
+    def _read_snapshot(self):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return None
+        schema = self._arrow_schema(pa)
+        for _ in range(3):
+            segments = self._segments()
+            if not segments:
+                return None
+            try:
+                tables = [self._open_segment(pa, segment).cast(schema) for segment in segments]
+            except FileNotFoundError:
+                # Merged away between listing and opening, list again
+                continue
+            return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        raise RuntimeError(f"Snapshot segments in {self.snapshot_dir} kept changing while being read")
@@ -0,0 +1,224 @@
+import json
+import math
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, json is the fallback
+    orjson = None
+
+
+class SubmissionError(Exception):
+    """
+    A rejected submission, carrying the HTTP status and a machine-readable code.
+    """
+
+    def __init__(self, status, code, message, index=None, student=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.index = index
+        self.student = student
+
+    def to_dict(self):
+        error = {'code': self.code, 'message': self.message}
+        if self.student is not None:
+            error['student'] = self.student
+        if self.index is not None:
+            error['index'] = self.index
+        return {'error': error}
+
+
+class Submission:
+    """
+    One student's validated responses as parallel columns, plus the test
+    form they answer (None for the bank's default form).
+
+    Iterating yields (question_id, time_spent, answer) tuples, so a
+    Submission can stand in wherever a list of response tuples is expected;
+    process_responses() reads the columns directly instead.
+    """
+    __slots__ = ('question_ids', 'time_spent', 'answers', 'form')
+
+    def __init__(self, question_ids, time_spent, answers, form=None):
+        self.question_ids = question_ids
+        self.time_spent = time_spent
+        self.answers = answers
+        self.form = form
+
+    def __iter__(self):
+        return zip(self.question_ids.tolist(), self.time_spent.tolist(), self.answers)
+
+    def __len__(self):
+        return len(self.answers)
+
+
+class SubmissionParser:
+    """
+    Decode and validate a /recieve_reponse body in a single pass.
+
+    The body is a JSON list of [question_id, time_spent, answer] items for
+    the bank's default form, or {"form": ..., "responses": [...]} to answer
+    another test form. It is decoded with orjson when installed (json
+    otherwise), and every item is checked as the column arrays are filled:
+    question ids must be integers in the form and appear once, times must be
+    finite numbers within [0, max_time_spent], answers short strings or numbers.
+    The first problem raises SubmissionError, so bad input costs at most one
+    partial pass and never reaches scoring.
+
+    Class batches are an object {"class_id": ..., "students": [{"student_id":
+    ..., "student_name": ..., "responses": [...]}, ...]} where every
+    student's responses follow the same rules. A "form" on a student, or
+    on the batch for every student, picks the test form.
+    """
+    MAX_BYTES = 64 * 1024
+    MAX_ITEMS = 500
+    MAX_TIME_SPENT = 3600
+    MAX_ANSWER_LENGTH = 64
+    MAX_BATCH_BYTES = 1024 * 1024
+    MAX_STUDENTS = 200
+    MAX_NAME_LENGTH = 100
+
+    def __init__(self, question_bank, max_bytes=None, max_items=None, max_time_spent=None,
+                 max_batch_bytes=None, max_students=None):
+        self.question_bank = question_bank
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self.max_items = self.MAX_ITEMS if max_items is None else max_items
+        self.max_time_spent = self.MAX_TIME_SPENT if max_time_spent is None else max_time_spent
+        self.max_batch_bytes = self.MAX_BATCH_BYTES if max_batch_bytes is None else max_batch_bytes
+        self.max_students = self.MAX_STUDENTS if max_students is None else max_students
+
+    def read(self, request):
+        """
+        Read and parse the body of a Flask request, enforcing max_bytes
+        before anything is decoded.
+        """
+        return self.parse(self._read_body(request, self.max_bytes))
+
+    def read_batch(self, request):
+        """
+        Read and parse a class batch: (class_id, [(student_id, student_name, Submission), ...]).
+        """
+        return self.validate_batch(self.decode(self._read_body(request, self.max_batch_bytes)))
+
+    @staticmethod
+    def _read_body(request, limit):
+        if not request.is_json:
+            raise SubmissionError(415, 'unsupported_media_type', "Expected an application/json body")
+        if request.content_length is not None and request.content_length > limit:
+            raise SubmissionError(413, 'payload_too_large', f"Body is larger than {limit} bytes")
+        # Bounded read, also covers chunked bodies without a Content-Length
+        body = request.stream.read(limit + 1)
+        if len(body) > limit:
+            raise SubmissionError(413, 'payload_too_large', f"Body is larger than {limit} bytes")
+        return body
+
+    def decode(self, body):
+        try:
+            if orjson is not None:
+                return orjson.loads(body)
+            return json.loads(body)
+        except ValueError:
+            raise SubmissionError(400, 'invalid_json', "Body is not valid JSON") from None
+
+    def parse(self, body):
+        """
+        Bytes in, validated Submission out.
+        """
+        body = self.decode(body)
+        if isinstance(body, dict):
+            return self.validate(body.get('responses'), body.get('form'))
+        return self.validate(body)
+
+    def validate(self, items, form=None):
+        question_index = self._form_index(form)
+        if not isinstance(items, list):
+            raise SubmissionError(422, 'invalid_submission', "Expected a list of [question_id, time_spent, answer] items")
+        if not items:
+            raise SubmissionError(422, 'empty_submission', "The submission has no responses")
+        if len(items) > self.max_items:
+            raise SubmissionError(413, 'too_many_responses', f"At most {self.max_items} responses per submission")
+
+        question_ids = np.empty(len(items), dtype=np.int64)
+        time_spent = np.empty(len(items), dtype=np.float64)
+        answers = [None] * len(items)
+        seen = set()
+
+        for index, item in enumerate(items):
+            if not isinstance(item, (list, tuple)) or len(item) != 3:
+                raise SubmissionError(422, 'invalid_item', "Each response must be [question_id, time_spent, answer]", index)
+            question_id, seconds, answer = item
+
+            if type(question_id) is not int:
+                raise SubmissionError(422, 'invalid_question_id', "question_id must be an integer", index)
+            if question_id not in question_index:
+                raise SubmissionError(422, 'unknown_question_id',
+                                      f"Unknown question id {question_id} in form {question_index.form!r}", index)
+            if question_id in seen:
+                raise SubmissionError(422, 'duplicate_question_id', f"Question {question_id} is answered twice", index)
+            seen.add(question_id)
+
+            if type(seconds) not in (int, float) or not math.isfinite(seconds) or not 0 <= seconds <= self.max_time_spent:
+                raise SubmissionError(422, 'invalid_time_spent',
+                                      f"time_spent must be a number between 0 and {self.max_time_spent:g}", index)
+
+            if type(answer) in (int, float):
+                answer = str(answer)
+            elif type(answer) is not str:
+                raise SubmissionError(422, 'invalid_answer', "answer must be a string or a number", index)
+            if len(answer) > self.MAX_ANSWER_LENGTH:
+                raise SubmissionError(422, 'invalid_answer', f"answer is longer than {self.MAX_ANSWER_LENGTH} characters", index)
+
+            question_ids[index] = question_id
+            time_spent[index] = seconds
+            answers[index] = answer
+
+        return Submission(question_ids, time_spent, answers, form=question_index.form)
+
+    def _form_index(self, form):
+        if form is None:
+            return self.question_bank.index
+        if type(form) not in (str, int):
+            raise SubmissionError(422, 'invalid_form', "form must be a string or an integer")
+        try:
+            return self.question_bank.form(form)
+        except KeyError:
+            raise SubmissionError(422, 'unknown_form', f"Unknown test form {form!r}") from None
+
+    def validate_batch(self, batch):
+        if not isinstance(batch, dict) or not isinstance(batch.get('students'), list):
+            raise SubmissionError(422, 'invalid_batch', "Expected an object with a list of students")
+        students = batch['students']
+        if not students:
+            raise SubmissionError(422, 'empty_batch', "The batch has no students")
+        if len(students) > self.max_students:
+            raise SubmissionError(413, 'too_many_students', f"At most {self.max_students} students per batch")
+
+        class_id = batch.get('class_id', 'class')
+        if type(class_id) not in (int, str) or not 0 < len(str(class_id)) <= self.MAX_NAME_LENGTH:
+            raise SubmissionError(422, 'invalid_class_id', "class_id must be a short string or integer")
+
+        parsed = []
+        seen = set()
+        for student_index, student in enumerate(students):
+            if not isinstance(student, dict):
+                raise SubmissionError(422, 'invalid_student', "Each student must be an object", student=student_index)
+            student_id = student.get('student_id')
+            student_name = student.get('student_name')
+            if type(student_id) is not int:
+                raise SubmissionError(422, 'invalid_student_id', "student_id must be an integer", student=student_index)
+            if student_id in seen:
+                raise SubmissionError(422, 'duplicate_student_id', f"Student {student_id} appears twice", student=student_index)
+            seen.add(student_id)
+            if type(student_name) is not str or not 0 < len(student_name) <= self.MAX_NAME_LENGTH:
+                raise SubmissionError(422, 'invalid_student_name', "student_name must be a non-empty string",
+                                      student=student_index)
+            try:
+                submission = self.validate(student.get('responses'), student.get('form', batch.get('form')))
+            except SubmissionError as error:
+                error.student = student_index
+                raise
+            parsed.append((student_id, student_name, submission))
+        return str(class_id), parsed
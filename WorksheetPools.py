@@ -0,0 +1,163 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class WorksheetPools:
+    """
+    Worksheet variants for every (question type, performance band), built ahead of time.
+
+    Each pool holds `variants` worksheets drawn from the question bank:
+    Struggling students get the easier half of a type's questions (rounded
+    up) with a relaxed time target, Mastered students the harder half with
+    a tighter one, and Needs Improvement the whole range. A worksheet has
+    at most `questions_per_worksheet` questions, fewer when its band's half
+    is smaller, so with a small bank the bands still differ in content and
+    not just in time target. A student's worksheet set
+    is then a dictionary lookup per question type. When the bank changes,
+    the pools are rebuilt on a background thread and swapped in whole;
+    requests keep getting the previous pools until then.
+    """
+    BANDS = ('Mastered', 'Needs Improvement', 'Struggling')
+    DEFAULT_BAND = 'Needs Improvement'
+
+    # Time target per question as a multiple of the bank's time threshold
+    TIME_FACTORS = {'Mastered': 0.75, 'Needs Improvement': 1.0, 'Struggling': 1.5}
+    GUIDANCE = {
+        'Mastered': "Challenge set: try to beat the time target.",
+        'Needs Improvement': "Practice set: focus on answering within the time target.",
+        'Struggling': "Foundations set: take your time and check each answer.",
+    }
+
+    def __init__(self, question_bank, variants=4, questions_per_worksheet=5, seed=0, max_students=10000):
+        self.question_bank = question_bank
+        self.variants = variants
+        self.questions_per_worksheet = questions_per_worksheet
+        self.seed = seed
+        self.max_students = max_students
+        self.version = None
+        self._pools = None
+        self._rebuilding = False
+        self._student_bands = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def pools(self):
+        """
+        {(question_type, band): [worksheet, ...]} for the current bank.
+        """
+        version = self.question_bank.current_version
+        if self._pools is None:
+            # Nothing to serve yet, build in the caller
+            with self._lock:
+                if self._pools is None:
+                    self._swap(self.question_bank.index, version)
+        elif version != self.version:
+            self._rebuild_in_background()
+        return self._pools
+
+    def refresh(self):
+        """
+        Rebuild in the caller if the bank changed. Returns True on rebuild.
+        """
+        version = self.question_bank.current_version
+        if self._pools is not None and version == self.version:
+            return False
+        with self._lock:
+            self._swap(self.question_bank.index, version)
+        return True
+
+    def worksheets_for(self, student_id, bands):
+        """
+        The student's worksheet set, one worksheet per question type in
+        `bands` ({question_type: band}). The variant is fixed per student.
+        """
+        pools = self.pools
+        variant = zlib.crc32(str(student_id).encode('utf-8')) % self.variants
+        worksheets = []
+        for question_type, band in sorted(bands.items()):
+            pool = pools.get((question_type, band if band in self.BANDS else self.DEFAULT_BAND))
+            if pool:
+                worksheets.append(pool[variant % len(pool)])
+        return worksheets
+
+    def remember(self, student_id, bands):
+        """
+        Keep a student's latest bands so their next worksheet lookup is free.
+        """
+        with self._lock:
+            self._student_bands[student_id] = dict(bands)
+            self._student_bands.move_to_end(student_id)
+            while len(self._student_bands) > self.max_students:
+                self._student_bands.popitem(last=False)
+
+    def bands_for(self, student_id):
+        with self._lock:
+            bands = self._student_bands.get(student_id)
+            return dict(bands) if bands is not None else None
+
+    def build(self, question_index):
+        """
+        Generate every pool for a compiled question bank.
+        """
+        pools = {}
+        for question_type, question_ids in question_index.question_ids_by_type().items():
+            # Optional 'difficulty' in the bank orders questions, otherwise bank order
+            ordered = sorted(
+                question_ids,
+                key=lambda question_id: (question_index.question(question_id).get('difficulty', 1), question_id),
+            )
+            half = (len(ordered) + 1) // 2
+            candidates = {
+                'Struggling': ordered[:half],
+                'Needs Improvement': ordered,
+                'Mastered': ordered[-half:],
+            }
+            for band in self.BANDS:
+                pools[(question_type, band)] = [
+                    self._worksheet(question_index, question_type, band, candidates[band], variant)
+                    for variant in range(self.variants)
+                ]
+        return pools
+
+    def _worksheet(self, question_index, question_type, band, candidates, variant):
+        rng = np.random.default_rng([self.seed, variant, zlib.crc32(f"{question_type}:{band}".encode('utf-8'))])
+        picked = rng.permutation(candidates)[:self.questions_per_worksheet]
+        thresholds = question_index.time_thresholds_for(picked)
+        return {
+            'question_type': question_type,
+            'band': band,
+            'variant': variant,
+            'guidance': self.GUIDANCE[band],
+            'questions': [
+                {
+                    'question_id': int(question_id),
+                    'prompt': question_index.question(int(question_id)).get('prompt'),
+                    'time_target': round(float(threshold) * self.TIME_FACTORS[band], 1),
+                }
+                for question_id, threshold in zip(picked, thresholds)
+            ],
+        }
+
+    def _swap(self, question_index, version):
+        pools = self.build(question_index)
+        self._pools = pools
+        self.version = version
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def rebuild():
+            try:
+                version = self.question_bank.current_version
+                self._swap(self.question_bank.index, version)
+            finally:
+                self._rebuilding = False
+
+        # Started on demand, so a pool object created before a fork holds no thread
+        threading.Thread(target=rebuild, name='worksheet-pools', daemon=True).start()
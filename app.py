@@ -1,17 +1,32 @@
 import os
 import json
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-import bcrypt
-from flask_mysqldb import MySQL
+import time
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, g, Response
 from EvaluationHandler import UnifiedStudentPerformanceReport
+from CohortStore import CohortStore
+from CohortAggregates import CohortAggregates
+from QuestionBank import QuestionBank
+from SubmissionLog import SubmissionLog
+from WorksheetPools import WorksheetPools
+from SubmissionParser import SubmissionParser, SubmissionError
+from ClassReports import score_class, build_class_archive
+from ProgressHistory import ProgressHistory
+from StudentClustering import StudentClustering
+from ReportJobs import ReportJobQueue
+from ReportStore import ReportStore
+from ReportCache import ReportCache
+from StudentRepository import create_student_repository
+from PasswordHasher import PasswordHasher, HashingBusy
+from Metrics import METRICS
 import secrets
-from flask import request, render_template, send_from_directory
-import time
+from flask import request, render_template, send_file
 import os
 from flask import session
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
+# Backstop for every route, submissions have their own tighter limit
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 1024 * 1024))
 # MySQL database configuration
 
 app.config['MYSQL_HOST'] = 'localhost'
@@ -19,7 +34,30 @@ app.config['MYSQL_USER'] = 'root'  # Replace with your MySQL username
 app.config['MYSQL_PASSWORD'] = "123"
 app.config['MYSQL_DB'] = 'countbuddy_db'  # Replace with your database name
 
-mysql = MySQL(app)
+# 'mysql' in production, 'sqlite' to run and load test locally without a MySQL server
+app.config['STUDENTS_DB_BACKEND'] = os.environ.get('STUDENTS_DB_BACKEND', 'mysql')
+app.config['SQLITE_PATH'] = os.environ.get('SQLITE_PATH', 'countbuddy.sqlite3')
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+
+students = create_student_repository(app.config)
+
+# bcrypt runs on its own bounded pool so a burst of logins can't starve other routes
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', 12))
+app.config['HASH_WORKERS'] = int(os.environ.get('HASH_WORKERS', 2))
+app.config['HASH_QUEUE_SIZE'] = int(os.environ.get('HASH_QUEUE_SIZE', 16))
+app.config['HASH_POOL_ENABLED'] = os.environ.get('HASH_POOL_ENABLED', '1') != '0'
+
+password_hasher = PasswordHasher(
+    rounds=app.config['BCRYPT_ROUNDS'],
+    max_workers=app.config['HASH_WORKERS'],
+    max_pending=app.config['HASH_QUEUE_SIZE'],
+    enabled=app.config['HASH_POOL_ENABLED'],
+)
+
+@app.errorhandler(HashingBusy)
+def hashing_busy(error):
+    # Reject fast and tell the client when to come back
+    return "Server is busy, please try again shortly.", 503, {'Retry-After': str(error.retry_after)}
 
 # Route to serve the signup page
 @app.route('/signup', methods=['GET'])
@@ -39,19 +77,20 @@ def login():
     password = request.form.get('password')
 
     # Check if the email exists in the database
-    cur = mysql.connection.cursor()
-    cur.execute("SELECT * FROM students WHERE email = %s", [email])
-    student = cur.fetchone()
+    student = students.get_credentials(email)
     
     if student is None:
         flash("Email not found", "error")
         return redirect(url_for('login_page'))
     
     # Retrieve the hashed password from the database for the given email
-    hashed_password_from_database = student[4]  # Password is in the 5th column (index 4)
+    hashed_password_from_database = student.password_hash
     
     # Compare the entered password with the hashed password
-    if bcrypt.checkpw(password.encode('utf-8'), hashed_password_from_database.encode('utf-8')):
+    if password_hasher.check(password, hashed_password_from_database):
+        # Reports and progress are tracked per student from here on
+        session['student_id'] = student.id
+        session['student_name'] = student.name
         flash("Login successful", "success")
         return redirect(url_for('dashboard'))
     else:
@@ -83,21 +122,15 @@ def register():
         return redirect(url_for('signup_page'))
 
     # Check if email already exists in the database
-    cur = mysql.connection.cursor()
-    cur.execute("SELECT * FROM students WHERE email = %s", [email])
-    student = cur.fetchone()
-    if student:
+    if students.email_exists(email):
         flash("Email already registered", "error")
         return redirect(url_for('signup_page'))
 
     # Hash the password before saving
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_password = password_hasher.hash(password)
 
     # Insert data into the database
-    cur.execute("INSERT INTO students (name, age, email, password) VALUES (%s, %s, %s, %s)", 
-                (name, age, email, hashed_password))
-    mysql.connection.commit()
-    cur.close()
+    students.create(name, age, email, hashed_password)
 
     flash("Registration successful", "success")
     return redirect(url_for('login_page'))
@@ -115,11 +148,7 @@ def forgot_password():
         confirm_password = request.form.get('confirm_password')
 
         # Check if the email exists in the students_db
-        cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM students WHERE email = %s", [email])
-        student = cur.fetchone()
-        
-        if student is None:
+        if not students.email_exists(email):
             flash("Email not found in our records", "error")
             return redirect(url_for('forgot_password_page'))
         
@@ -129,12 +158,10 @@ def forgot_password():
             return redirect(url_for('forgot_password_page'))
         
         # Hash the new password with bcrypt
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = password_hasher.hash(new_password)
 
         # Update the password in the database (hashed version)
-        cur.execute("UPDATE students SET password = %s WHERE email = %s", (hashed_password.decode('utf-8'), email))
-        mysql.connection.commit()
-        cur.close()
+        students.update_password(email, hashed_password)
 
         flash("Password successfully reset", "success")
         return redirect(url_for('login_page'))
@@ -199,54 +226,335 @@ def about():
 
 @app.route('/worksheet', methods=['GET'])
 def worksheet():
-    return render_template('worksheets_page.html')
-
-PATH_TO_DIRECTORY = r"E:\Anas Folder\count_buddy"
-
-@app.route('/recieve_reponse', methods=['POST'])
-def receive_response():
-    # Expecting JSON data from the client, which should be a list of lists
-    data = request.get_json()
+    # Personalized from the student's latest performance bands, the worksheets themselves are prebuilt
+    student_id = request.args.get('student_id', session.get('student_id'), type=int)
+    # Bands are only shown to that student, anyone else gets the default worksheets
+    if student_id is not None and session.get('student_id') != student_id:
+        return "Error: Log in as this student to see their worksheets.", 403
+    return render_template('worksheets_page.html', worksheets=WORKSHEET_POOLS.worksheets_for(student_id, student_bands(student_id)))
+
+@app.route('/worksheets/<int:student_id>', methods=['GET'])
+def worksheets_json(student_id):
+    # A student's bands are only shown to that student
+    if session.get('student_id') != student_id:
+        return jsonify({'error': {'code': 'forbidden', 'message': "Log in as this student to see their worksheets"}}), 403
+    return jsonify({
+        'student_id': student_id,
+        'worksheets': WORKSHEET_POOLS.worksheets_for(student_id, student_bands(student_id)),
+    })
+
+# Where finished reports are stored, relative to the app unless overridden
+app.config['REPORTS_DIR'] = os.environ.get('REPORTS_DIR', os.path.join(app.root_path, 'reports'))
+# Stored reports never change, so browsers may keep them for this long
+app.config['REPORT_MAX_AGE'] = int(os.environ.get('REPORT_MAX_AGE', 7 * 24 * 3600))
+# Stored reports are deleted after this many seconds, keep it well above REPORT_MAX_AGE
+app.config['REPORT_RETENTION'] = int(os.environ.get('REPORT_RETENTION', ReportStore.MAX_AGE))
+
+# Every scored submission is logged durably and compacted into memory-mapped snapshot segments
+SUBMISSION_LOG = SubmissionLog(
+    os.environ.get('SUBMISSION_LOG_PATH', os.path.join(app.root_path, 'submissions.sqlite3')),
+    compact_every=int(os.environ.get('SUBMISSION_COMPACT_EVERY', 5000)),
+)
+
+# Per-student rollups across repeated tests, updated in O(1) per attempt
+PROGRESS_HISTORY = ProgressHistory(os.environ.get('PROGRESS_DB_PATH', os.path.join(app.root_path, 'progress.sqlite3')))
+
+# Cohort clusters are refit when a question type's average accuracy drifts past
+# the tolerance (0-1 scale) or after the refresh interval in seconds
+app.config['COHORT_CLUSTER_TOLERANCE'] = float(os.environ.get('COHORT_CLUSTER_TOLERANCE', CohortAggregates.TOLERANCE))
+app.config['COHORT_CLUSTER_REFRESH_INTERVAL'] = float(
+    os.environ.get('COHORT_CLUSTER_REFRESH_INTERVAL', CohortAggregates.REFRESH_INTERVAL)
+)
+
+# Reference cohort plus logged submissions, parsed once per process and
+# reloaded only when the file or the snapshot changes
+COHORT_STORE = CohortStore.shared(
+    'classified_student_data.csv',
+    submission_log=SUBMISSION_LOG,
+    tolerance=app.config['COHORT_CLUSTER_TOLERANCE'],
+    refresh_interval=app.config['COHORT_CLUSTER_REFRESH_INTERVAL'],
+)
+
+# Student-level performance groups, trained offline and retrained as the cohort grows
+STUDENT_CLUSTERING = StudentClustering(
+    os.environ.get('CLUSTER_MODEL_PATH', os.path.join(app.root_path, 'student_clusters.npz')),
+    COHORT_STORE,
+    [UnifiedStudentPerformanceReport.CLUSTER_LABELS[index] for index in sorted(UnifiedStudentPerformanceReport.CLUSTER_LABELS)],
+    retrain_interval=float(os.environ.get('CLUSTER_RETRAIN_INTERVAL', StudentClustering.RETRAIN_INTERVAL)),
+)
+
+# Answers and question types, recompiled when the bank file changes
+QUESTION_BANK = QuestionBank.shared(UnifiedStudentPerformanceReport.QUESTION_BANK_PATH)
+
+# Worksheet variants per (question type, performance band), rebuilt in the background when the bank changes
+WORKSHEET_POOLS = WorksheetPools(
+    QUESTION_BANK,
+    variants=int(os.environ.get('WORKSHEET_VARIANTS', 4)),
+    questions_per_worksheet=int(os.environ.get('WORKSHEET_SIZE', 5)),
+)
+
+def student_bands(student_id):
+    """
+    {question_type: band} from the student's latest submission, the default band for new students.
+    """
+    bands = WORKSHEET_POOLS.bands_for(student_id) if student_id is not None else None
+    if bands is None:
+        rows = SUBMISSION_LOG.latest_submission(student_id) if student_id is not None else None
+        if rows is None or rows.empty:
+            return {question_type: WorksheetPools.DEFAULT_BAND for question_type in QUESTION_BANK.index.question_ids_by_type()}
+        bands = UnifiedStudentPerformanceReport.performance_bands(UnifiedStudentPerformanceReport.summarize(rows))
+        WORKSHEET_POOLS.remember(student_id, bands)
+    return bands
+
+# Reports are built off the request thread, the client polls the job status. The job
+# table is shared on disk, so any server worker can answer a poll
+REPORT_JOBS = ReportJobQueue(
+    os.environ.get('REPORT_JOBS_PATH', os.path.join(app.root_path, 'report_jobs.sqlite3')),
+    max_workers=int(os.environ.get('REPORT_WORKERS', 2)),
+    timeout=float(os.environ.get('REPORT_JOB_TIMEOUT', 600)),
+)
+
+# Finished PDFs, one file per student submission however often it is rebuilt
+REPORT_STORE = ReportStore(app.config['REPORTS_DIR'], max_age=app.config['REPORT_RETENTION'])
+
+# Identical (normalized) submissions reuse the PDF built the first time
+REPORT_CACHE = ReportCache(
+    os.environ.get('REPORT_CACHE_DIR', os.path.join(app.root_path, 'report_cache')),
+    memory_items=int(os.environ.get('REPORT_CACHE_ITEMS', 128)),
+    disk_max_bytes=int(os.environ.get('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+    time_bucket=float(os.environ.get('REPORT_CACHE_TIME_BUCKET', 1.0)),
+)
+
+# Submissions are size-limited, decoded and validated before anything is queued
+SUBMISSION_PARSER = SubmissionParser(
+    QUESTION_BANK,
+    max_bytes=int(os.environ.get('SUBMISSION_MAX_BYTES', SubmissionParser.MAX_BYTES)),
+    max_items=int(os.environ.get('SUBMISSION_MAX_ITEMS', SubmissionParser.MAX_ITEMS)),
+    max_time_spent=float(os.environ.get('SUBMISSION_MAX_TIME_SPENT', SubmissionParser.MAX_TIME_SPENT)),
+    max_batch_bytes=int(os.environ.get('CLASS_BATCH_MAX_BYTES', SubmissionParser.MAX_BATCH_BYTES)),
+    max_students=int(os.environ.get('CLASS_BATCH_MAX_STUDENTS', SubmissionParser.MAX_STUDENTS)),
+)
+
+@app.errorhandler(SubmissionError)
+def submission_error(error):
+    return jsonify(error.to_dict()), error.status
+
+def submission_time_thresholds(submission):
+    # Per-question thresholds are part of the keys, a cached report never carries another submission's categories
+    return QUESTION_BANK.form(submission.form).time_thresholds_for(submission.question_ids)
+
+def report_cache_key(student_id, student_name, submission, cluster_model):
+    """
+    Key of the report on a submission: the normalized responses plus everything else the PDF shows.
+    """
+    return REPORT_CACHE.key_for(student_id, student_name, submission, COHORT_STORE.current_version,
+                                variant=f"{UnifiedStudentPerformanceReport.REPORT_FORMAT_VERSION}"
+                                        f":{UnifiedStudentPerformanceReport.CHART_BACKEND}:{QUESTION_BANK.current_version}"
+                                        f":{submission.form}:{cluster_model.trained_at!r}",
+                                time_thresholds=submission_time_thresholds(submission))
+
+def build_student_report(student_id, student_name, responses, cache_key, submission_key, cluster_model):
+    student_report = UnifiedStudentPerformanceReport(student_id, student_name, responses, COHORT_STORE,
+                                                     cluster_model=cluster_model)
 
-    # Convert each inner list into a tuple
-    converted_data = [tuple(item) for item in data]
-    
-    print("__________________",converted_data)
-    # Create a report object
-    student_report = UnifiedStudentPerformanceReport(4, "Hafsaaaa", converted_data, 'classified_student_data.csv')
-    
     # Process the responses and generate the report
-    student_report.process_responses()
+    student_report.process_responses(update_aggregates=False)
+    student_report.progress, recorded = PROGRESS_HISTORY.record_attempt(student_id, student_report.new_student_df,
+                                                                        submission_key=submission_key)
+    if recorded:
+        # Retries and double submits are scored and reported, but join the cohort baseline only once
+        SUBMISSION_LOG.append(student_report.new_student_df)
+        student_report.add_to_cohort()
+        SUBMISSION_LOG.maybe_compact()
     student_report.generate_summary_and_recommendations()
-    student_report.generate_report()
+    WORKSHEET_POOLS.remember(student_id, UnifiedStudentPerformanceReport.performance_bands(student_report.performance_summary))
+    pdf_bytes = student_report.generate_report()
+    REPORT_CACHE.put(cache_key, pdf_bytes)
+    STUDENT_CLUSTERING.maybe_retrain()
+    return REPORT_STORE.put(student_id, pdf_bytes, cache_key)
 
-    # Redirect to the show_report page to display the report
-    return redirect(url_for('show_report'))
+@app.route('/recieve_reponse', methods=['POST'])
+def receive_response():
+    # Reports belong to the logged-in student
+    student_id, student_name = session.get('student_id'), session.get('student_name')
+    if student_id is None:
+        return jsonify({'error': {'code': 'not_logged_in', 'message': "Log in before submitting a test"}}), 401
+
+    # Expecting a JSON list of [question_id, time_spent, answer] (or {"form", "responses"}), rejected with a 4xx if malformed
+    converted_data = SUBMISSION_PARSER.read(request)
+
+    # The report shows the student's performance group, so a retrained model is a new report
+    cluster_model = STUDENT_CLUSTERING.model
+    cache_key = report_cache_key(student_id, student_name, converted_data, cluster_model)
+    # The normalized submission alone: resubmitting it is a retry, not another attempt in the progress history
+    submission_key = REPORT_CACHE.key_for(student_id, student_name, converted_data, None,
+                                          variant=str(converted_data.form),
+                                          time_thresholds=submission_time_thresholds(converted_data))
+    pdf_bytes = REPORT_CACHE.get(cache_key)
+    if pdf_bytes is not None:
+        # Same submission as before, the report is ready straight away
+        job_id = REPORT_JOBS.add_completed(REPORT_STORE.put(student_id, pdf_bytes, cache_key))
+        status_code = 200
+    else:
+        # Queue the report and hand back a job id to poll. A resubmit while the first build is
+        # still queued or running (in any worker) gets that build's job id instead of a second build
+        job_id = REPORT_JOBS.submit(build_student_report, student_id, student_name, converted_data, cache_key,
+                                    submission_key, cluster_model, job_key=cache_key)
+        status_code = 202
+
+    return jsonify({
+        'job_id': job_id,
+        'status_url': url_for('report_status', job_id=job_id),
+        'report_url': url_for('show_report', job_id=job_id),
+    }), status_code
+
+def build_class_report(class_id, students, class_key, cluster_model):
+    # One scoring pass and one shared cohort chart for the whole class. Batches aren't tied to a
+    # login, so they are only reported on: no progress, submission log, worksheet bands or cohort updates
+    reports = score_class(students, COHORT_STORE, cluster_model=cluster_model, update_aggregates=False)
+    archive = build_class_archive(reports)
+    return REPORT_STORE.put(class_id, archive, class_key, kind='class')
+
+@app.route('/class_reports', methods=['POST'])
+def receive_class_responses():
+    # {"class_id": ..., "students": [{"student_id", "student_name", "responses"}, ...]}
+    # Student ids are taken on trust here, which is why the batch writes nothing about them
+    class_id, students = SUBMISSION_PARSER.read_batch(request)
+    # The archive is stored under the batch's submissions, so resending the batch reuses its file
+    cluster_model = STUDENT_CLUSTERING.model
+    class_key = '\n'.join(report_cache_key(student_id, student_name, submission, cluster_model)
+                          for student_id, student_name, submission in students)
+    job_id = REPORT_JOBS.submit(build_class_report, class_id, students, class_key, cluster_model)
+    return jsonify({
+        'job_id': job_id,
+        'students': len(students),
+        'status_url': url_for('report_status', job_id=job_id),
+    }), 202
+
+@app.route('/progress/<int:student_id>', methods=['GET'])
+def student_progress(student_id):
+    # A student's history is only shown to that student
+    if session.get('student_id') != student_id:
+        return jsonify({'error': {'code': 'forbidden', 'message': "Log in as this student to see their progress"}}), 403
+    return jsonify({'student_id': student_id, 'question_types': PROGRESS_HISTORY.progress(student_id)})
+
+@app.route('/report_cache/stats', methods=['GET'])
+def report_cache_stats():
+    return jsonify(REPORT_CACHE.stats())
+
+@app.route('/cohort/percentiles', methods=['POST'])
+def cohort_percentiles():
+    # Batched lookups: [{"question_type": ..., "accuracy": 0-1, "time_spent": seconds}, ...]
+    lookups = request.get_json(silent=True)
+    if not isinstance(lookups, list):
+        return jsonify({'error': {'code': 'invalid_lookups', 'message': "Expected a JSON list of lookups"}}), 400
+
+    index = COHORT_STORE.index
+    ranks = []
+    for position, lookup in enumerate(lookups):
+        try:
+            ranks.append(index.percentile(lookup['question_type'], lookup.get('accuracy'), lookup.get('time_spent')))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return jsonify({'error': {
+                'code': 'invalid_lookup',
+                'message': "Each lookup needs a question_type and numeric accuracy/time_spent",
+                'index': position,
+            }}), 400
+    return jsonify({'ranks': ranks})
+
+@app.route('/report_status/<job_id>', methods=['GET'])
+def report_status(job_id):
+    job = REPORT_JOBS.status(job_id)
+    if job is None:
+        return jsonify({'error': {'code': 'unknown_job', 'message': "Unknown job id"}}), 404
+
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'error': {'code': 'report_failed', 'message': job['error']} if job['status'] == ReportJobQueue.FAILED else None,
+        'report_url': url_for('show_report', job_id=job_id) if job['status'] == ReportJobQueue.DONE else None,
+        'download_url': url_for('download_file', filename=ReportStore.filename(job['result']))
+                        if job['status'] == ReportJobQueue.DONE else None,
+    })
 
 @app.route('/show_report', methods=['GET'])
 def show_report():
-    # Simulate a small delay (use time.sleep, not time.delay)
-    time.sleep(2)
+    job = REPORT_JOBS.status(request.args.get('job_id', ''))
+    if job is None:
+        return "Error: Unknown report job.", 404
 
-    # Assuming the report is saved as Performance_Report.pdf
-    report_path = os.path.join(PATH_TO_DIRECTORY, 'Performance_Report.pdf')
-    print(report_path)
+    # Still being generated, tell the client when to poll again
+    if job['status'] in (ReportJobQueue.QUEUED, ReportJobQueue.RUNNING):
+        return jsonify({'job_id': job['job_id'], 'status': job['status']}), 202, {'Retry-After': '1'}
+
+    if job['status'] == ReportJobQueue.FAILED:
+        return "Error: Report generation failed.", 500
+
+    report_key = job['result']
     # Ensure the file exists before trying to fetch it
-    if os.path.exists(report_path):
-        fetchfile = 'Performance_Report.pdf'  # Pass the file name to the template
+    if REPORT_STORE.exists(report_key):
+        fetchfile = REPORT_STORE.filename(report_key)  # Pass the file name to the template
         return render_template('show_report.html', fetch=fetchfile)
     else:
         return "Error: Report file not found."
 
 @app.route('/download/<filename>')
 def download_file(filename):
-    # Make sure the file exists in the reports directory
-    report_path = os.path.join(PATH_TO_DIRECTORY, filename)
-    if os.path.exists(report_path):
-        return send_from_directory(PATH_TO_DIRECTORY, filename, as_attachment=True)
-        # return redirect(url_for('templates\homepage.html'))
-    else:
-        return "Error: File not found."
+    # Make sure the file is a stored report
+    report_key = ReportStore.key_from_filename(filename)
+    if report_key is None or not REPORT_STORE.exists(report_key):
+        return "Error: File not found.", 404
+
+    # conditional=True answers If-None-Match with 304 and serves Range requests
+    response = send_file(
+        REPORT_STORE.path(report_key),
+        mimetype=ReportStore.mimetype(report_key),
+        as_attachment=True,
+        download_name=filename,
+        conditional=True,
+        etag=REPORT_STORE.etag(report_key),
+        max_age=app.config['REPORT_MAX_AGE'],
+    )
+    # Reports are about one child, keep them out of shared caches
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+
+# Per-route latency and in-flight gauges, switched off entirely with METRICS_ENABLED=0
+if METRICS.enabled:
+    @app.before_request
+    def start_request_timer():
+        g.metrics_route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        g.metrics_started = time.perf_counter()
+        METRICS.add('countbuddy_http_requests_in_flight', 1, route=g.metrics_route)
+
+    @app.after_request
+    def record_request_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def stop_request_timer(error=None):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        METRICS.observe('countbuddy_http_request_seconds', time.perf_counter() - started,
+                        route=g.metrics_route, method=request.method, status=g.pop('metrics_status', 500))
+        METRICS.add('countbuddy_http_requests_in_flight', -1, route=g.metrics_route)
+
+    REPORT_CACHE_COUNTERS = ('hits_memory', 'hits_disk', 'misses', 'evictions')
+    METRICS.add_collector(lambda: [
+        (f'countbuddy_report_cache_{name}_total', 'counter', f"Report cache {name.replace('_', ' ')}.", {(): value})
+        if name in REPORT_CACHE_COUNTERS else
+        (f'countbuddy_report_cache_{name}', 'gauge', f"Report cache {name.replace('_', ' ')}.", {(): value})
+        for name, value in REPORT_CACHE.stats().items()
+    ])
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/')
@@ -254,5 +562,37 @@ def landing_page_view():
     return render_template('landingpage.html')
 
 
+def warm_up():
+    """
+    Load everything the report path needs, so a pre-forking server can do it
+    once in the parent and share it copy-on-write with its workers. Starts
+    no threads and leaves no open connections behind.
+    """
+    COHORT_STORE.refresh()
+    QUESTION_BANK.refresh()
+    WORKSHEET_POOLS.refresh()
+    STUDENT_CLUSTERING.model
+
+    from ReportTemplate import get_report_template
+    import ReportCharts  # noqa: F401
+    get_report_template()
+
+    # Loading the cohort read pending rows from the log, that handle must not be inherited
+    SUBMISSION_LOG.close()
+    REPORT_JOBS.close()
+
+
+def reload_state():
+    """
+    Re-read the cohort and question bank if they changed on disk, e.g. before
+    a server forks a fresh set of workers.
+    """
+    COHORT_STORE.refresh()
+    QUESTION_BANK.refresh()
+    WORKSHEET_POOLS.refresh()
+    SUBMISSION_LOG.close()
+    REPORT_JOBS.close()
+
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,123 @@
+"""
+Login latency under concurrent load, with and without the bcrypt pool.
+
+A throwaway SQLite database is seeded with one student, then `--clients`
+threads hammer POST /login through the Flask test client while one more
+thread keeps polling a cheap route. p50/p99 are reported for both, along
+with how many logins were rejected with 503, once with hashing inline on
+the request thread and once on the bounded PasswordHasher pool.
+
+Usage:
+    python benchmarks/bench_login.py --clients 16 --requests 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000 if samples else None,
+        'p99_ms': percentile(samples, 99) * 1000 if samples else None,
+    }
+
+
+def run_load(app_module, clients, requests_per_client):
+    flask_app = app_module.app
+    login_latencies, other_latencies = [], []
+    rejected = 0
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def login_client():
+        nonlocal rejected
+        client = flask_app.test_client()
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            response = client.post('/login', data={'email': 'bench@example.com', 'password': 'bench-password'})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 503:
+                    rejected += 1
+                else:
+                    login_latencies.append(elapsed)
+
+    def other_client():
+        # Any cheap route works, this one never touches bcrypt or templates
+        client = flask_app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            client.get('/report_status/unknown')
+            other_latencies.append(time.perf_counter() - started)
+            time.sleep(0.005)
+
+    watcher = threading.Thread(target=other_client)
+    watcher.start()
+    threads = [threading.Thread(target=login_client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    done.set()
+    watcher.join()
+
+    return {
+        'wall_seconds': wall,
+        'login': summarize(login_latencies),
+        'login_rejected_503': rejected,
+        'other_route': summarize(other_latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /login under concurrent load.")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=8, help="Logins per client")
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument('--json', dest='json_path', default=None)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='countbuddy-bench-')
+    os.environ['STUDENTS_DB_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(workdir, 'students.sqlite3')
+    os.environ['BCRYPT_ROUNDS'] = str(args.rounds)
+    os.environ['SUBMISSION_LOG_PATH'] = os.path.join(workdir, 'submissions.sqlite3')
+    os.environ['PROGRESS_DB_PATH'] = os.path.join(workdir, 'progress.sqlite3')
+    os.environ['REPORT_JOBS_PATH'] = os.path.join(workdir, 'report_jobs.sqlite3')
+    os.environ['DB_POOL_SIZE'] = str(args.clients + 1)
+    sys.path.insert(0, REPO_ROOT)
+    import app as app_module
+
+    app_module.students.create('Bench', 7, 'bench@example.com', app_module.password_hasher.hash('bench-password'))
+
+    results = {'clients': args.clients, 'requests_per_client': args.requests, 'bcrypt_rounds': args.rounds}
+    for label, enabled in (('inline', False), ('pool', True)):
+        app_module.password_hasher.enabled = enabled
+        results[label] = run_load(app_module, args.clients, args.requests)
+
+    print(json.dumps(results, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+End-to-end benchmark for the evaluation and report pipeline.
+
+Stage timings: every UnifiedStudentPerformanceReport stage is timed on its
+own (process_responses, generate_summary_and_recommendations,
+calculate_average_scores_and_cluster, both visualizations and
+generate_report) against reference cohorts of increasing size. The 1,500
+row cohort is the shipped classified_student_data.csv, the larger ones are
+synthetic rows with the same shape.
+
+HTTP timings: /recieve_reponse (accept and until the job is done), /login
+and /download/<filename> are driven through the Flask test client against a
+throwaway SQLite database and report directory. Every iteration submits
+different answers and times, so the report cache never short-circuits a job.
+
+Latency percentiles and peak memory are printed and written as JSON so runs
+can be compared.
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 1500,150000,1500000 --iterations 20 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from CohortStore import CohortStore  # noqa: E402
+from EvaluationHandler import UnifiedStudentPerformanceReport  # noqa: E402
+from generate_cohort import generate_cohort  # noqa: E402
+
+SAMPLE_RESPONSES = [
+    (1, 2, '9'), (2, 2, '9'), (3, 3, '4'), (4, 2, '9'), (5, 2, '4'),
+    (6, 3, 'Triangle'), (7, 8, 'Sphere'), (8, 3, 'Square'), (9, 5, 'Cube'), (10, 6, 'Cone'),
+    (11, 6, '8'), (12, 3, '8'), (13, 2, '8'), (14, 2, '9'), (15, 3, '16'),
+]
+
+SHIPPED_COHORT = os.path.join(REPO_ROOT, 'classified_student_data.csv')
+
+
+def varied_responses(iteration):
+    """
+    SAMPLE_RESPONSES with answers and times redrawn per iteration, so no two
+    iterations share a report cache key.
+    """
+    rng = random.Random(iteration)
+    return [
+        [question_id, round(rng.uniform(1, 60), 1), answer if rng.random() < 0.7 else 'wrong']
+        for question_id, _, answer in SAMPLE_RESPONSES
+    ]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(pct):
+        return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pick(50),
+        'p95_ms': pick(95),
+        'p99_ms': pick(99),
+    }
+
+
+def write_synthetic_cohort(path, rows, seed=0):
+    """
+    Cohort CSV with the shape of classified_student_data.csv, one row per question in the bank.
+    """
+    generate_cohort(path, max(1, rows // len(UnifiedStudentPerformanceReport.question_bank())), seed=seed)
+
+
+def bench_stages(cohort_path, iterations):
+    store = CohortStore(cohort_path)
+    started = time.perf_counter()
+    store.refresh()
+    load_seconds = time.perf_counter() - started
+
+    timings = {name: [] for name in (
+        'process_responses', 'generate_summary_and_recommendations', 'calculate_average_scores_and_cluster',
+        'visualize_time_spent', 'visualize_average_scores_with_clusters', 'generate_report',
+    )}
+    for _ in range(iterations):
+        report = UnifiedStudentPerformanceReport(4, "Bench", SAMPLE_RESPONSES, store)
+        for name, call in (
+            ('process_responses', report.process_responses),
+            ('generate_summary_and_recommendations', report.generate_summary_and_recommendations),
+            ('calculate_average_scores_and_cluster', report.calculate_average_scores_and_cluster),
+            ('visualize_time_spent', report.visualize_time_spent),
+            ('visualize_average_scores_with_clusters',
+             lambda: report.visualize_average_scores_with_clusters(report.average_question_type_scores)),
+            ('generate_report', report.generate_report),
+        ):
+            started = time.perf_counter()
+            call()
+            timings[name].append(time.perf_counter() - started)
+
+    # One more full pass under tracemalloc for the Python-level peak
+    tracemalloc.start()
+    report = UnifiedStudentPerformanceReport(4, "Bench", SAMPLE_RESPONSES, store)
+    report.process_responses()
+    report.generate_summary_and_recommendations()
+    report.generate_report()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'rows': len(store.data),
+        'cohort_load_seconds': load_seconds,
+        'stages': {name: percentiles(samples) for name, samples in timings.items()},
+        'report_peak_traced_mb': peak / (1024 * 1024),
+    }
+
+
+def bench_http(iterations, bcrypt_rounds):
+    workdir = tempfile.mkdtemp(prefix='countbuddy-bench-')
+    os.environ['STUDENTS_DB_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(workdir, 'students.sqlite3')
+    os.environ['BCRYPT_ROUNDS'] = str(bcrypt_rounds)
+    os.environ['SUBMISSION_LOG_PATH'] = os.path.join(workdir, 'submissions.sqlite3')
+    os.environ['PROGRESS_DB_PATH'] = os.path.join(workdir, 'progress.sqlite3')
+    os.environ['REPORT_JOBS_PATH'] = os.path.join(workdir, 'report_jobs.sqlite3')
+    # Nothing the run writes may land in the repository
+    os.environ['REPORTS_DIR'] = os.path.join(workdir, 'reports')
+    os.environ['REPORT_CACHE_DIR'] = os.path.join(workdir, 'report_cache')
+    os.environ['CLUSTER_MODEL_PATH'] = os.path.join(workdir, 'student_clusters.npz')
+
+    os.chdir(REPO_ROOT)
+    import app as app_module
+
+    app_module.students.create('Bench', 7, 'bench@example.com', app_module.password_hasher.hash('bench-password'))
+    client = app_module.app.test_client()
+    # Submissions need a logged-in student
+    client.post('/login', data={'email': 'bench@example.com', 'password': 'bench-password'})
+
+    accept, complete, login, download = [], [], [], []
+    report_key = None
+    for iteration in range(iterations):
+        started = time.perf_counter()
+        response = client.post('/recieve_reponse', json=varied_responses(iteration))
+        accept.append(time.perf_counter() - started)
+
+        job_id = response.get_json()['job_id']
+        while True:
+            job = app_module.REPORT_JOBS.status(job_id)
+            if job['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.005)
+        complete.append(time.perf_counter() - started)
+        report_key = job['result'] or report_key
+
+        started = time.perf_counter()
+        client.post('/login', data={'email': 'bench@example.com', 'password': 'bench-password'})
+        login.append(time.perf_counter() - started)
+
+    filename = app_module.REPORT_STORE.filename(report_key)
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = client.get(f'/download/{filename}')
+        response.get_data()
+        download.append(time.perf_counter() - started)
+
+    return {
+        'recieve_reponse_accept': percentiles(accept),
+        'recieve_reponse_until_done': percentiles(complete),
+        'login': percentiles(login),
+        'download': percentiles(download),
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation and report pipeline.")
+    parser.add_argument('--sizes', default='1500,150000,1500000',
+                        help="Comma separated cohort sizes in rows, 1500 uses the shipped CSV")
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--http-iterations', type=int, default=10)
+    parser.add_argument('--bcrypt-rounds', type=int, default=12)
+    parser.add_argument('--skip-http', action='store_true')
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cohorts': [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix='countbuddy-cohorts-')
+    for size in (int(value) for value in args.sizes.split(',')):
+        if size == 1500:
+            cohort_path = SHIPPED_COHORT
+        else:
+            cohort_path = os.path.join(workdir, f'cohort_{size}.csv')
+            write_synthetic_cohort(cohort_path, size)
+        print(f"Cohort of {size} rows...", file=sys.stderr)
+        results['cohorts'].append(bench_stages(cohort_path, args.iterations))
+
+    if not args.skip_http:
+        print("HTTP routes...", file=sys.stderr)
+        results['http'] = bench_http(args.http_iterations, args.bcrypt_rounds)
+
+    results['peak_rss_mb'] = peak_rss_mb()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
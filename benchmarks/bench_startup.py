@@ -0,0 +1,89 @@
+"""
+Cold-start benchmark for the web app.
+
+Runs `import app` in fresh interpreters and reports the import wall time
+and peak RSS. It also fails if any of the heavy report libraries get imported
+at startup, so lazy loading regressions show up straight away.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --max-seconds 2 --max-rss-mb 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['matplotlib', 'sklearn', 'reportlab']
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+except ImportError:
+    rss_mb = None
+heavy = sorted(name for name in %r if name in sys.modules)
+print(json.dumps({'seconds': elapsed, 'rss_mb': rss_mb, 'heavy_modules': heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_once(module_dir):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=module_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold `import app` time and RSS.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None, help="Fail if the median import time is above this")
+    parser.add_argument('--max-rss-mb', type=float, default=None, help="Fail if the median peak RSS is above this")
+    parser.add_argument('--json', dest='json_path', default=None, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    samples = [measure_once(REPO_ROOT) for _ in range(args.runs)]
+    seconds = [sample['seconds'] for sample in samples]
+    rss = [sample['rss_mb'] for sample in samples if sample['rss_mb'] is not None]
+    heavy = sorted({name for sample in samples for name in sample['heavy_modules']})
+
+    results = {
+        'runs': args.runs,
+        'import_seconds_median': statistics.median(seconds),
+        'import_seconds_min': min(seconds),
+        'rss_mb_median': statistics.median(rss) if rss else None,
+        'heavy_modules_loaded': heavy,
+    }
+    print(json.dumps(results, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if args.max_seconds is not None and results['import_seconds_median'] > args.max_seconds:
+        failures.append(f"import took {results['import_seconds_median']:.3f}s (limit {args.max_seconds}s)")
+    if args.max_rss_mb is not None and rss and results['rss_mb_median'] > args.max_rss_mb:
+        failures.append(f"RSS {results['rss_mb_median']:.1f} MB (limit {args.max_rss_mb} MB)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Generate performance reports for every student in a cohort file.
+
+Usage:
+    python bulk_reports.py synthetic_student_data.csv --output-dir bulk_reports --workers 4
+
+Rows are grouped by student_id and each student's report is built on a
+process pool. Finished PDFs are written atomically as student_<id>.pdf, so
+re-running the same command after an interruption skips the students that
+already have a report and only builds the rest.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from CohortStore import CohortStore
+from EvaluationHandler import UnifiedStudentPerformanceReport
+
+SCORED_COLUMNS = ['student_id', 'question_id', 'question_type', 'time_spent', 'accuracy']
+
+_cohort_store = None
+
+
+def _init_worker(cohort_path):
+    # Each worker process parses the reference cohort once and reuses it
+    global _cohort_store
+    _cohort_store = CohortStore.shared(cohort_path)
+
+
+def report_path(output_dir, student_id):
+    return os.path.join(output_dir, f"student_{student_id}.pdf")
+
+
+def build_report(student_id, student_name, rows, output_dir):
+    student_report = UnifiedStudentPerformanceReport(student_id, student_name, None, _cohort_store)
+    # Cohort rows are already part of the baseline, don't count them twice
+    student_report.load_scored_rows(rows, update_aggregates=False)
+    student_report.generate_summary_and_recommendations()
+    pdf_bytes = student_report.generate_report()
+
+    path = report_path(output_dir, student_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(pdf_bytes)
+    os.replace(tmp_path, path)
+    return student_id
+
+
+def load_students(cohort_file):
+    data = pd.read_csv(cohort_file)
+    missing = [column for column in SCORED_COLUMNS if column not in data.columns]
+    if missing:
+        raise ValueError(f"{cohort_file} is missing columns: {', '.join(missing)}")
+
+    students = []
+    for student_id, rows in data.groupby('student_id', sort=True):
+        if 'student_name' in rows.columns:
+            student_name = str(rows['student_name'].iloc[0])
+        else:
+            student_name = f"Student {student_id}"
+        students.append((student_id, student_name, rows))
+    return students
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate reports for every student in a cohort file.")
+    parser.add_argument('cohort_file', help="CSV shaped like classified_student_data.csv")
+    parser.add_argument('--output-dir', default='bulk_reports', help="Directory for the generated PDFs")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument('--reference-cohort', default='classified_student_data.csv',
+                        help="Cohort used for the average-score comparison")
+    parser.add_argument('--no-resume', action='store_true', help="Rebuild reports that already exist")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    students = load_students(args.cohort_file)
+
+    pending = students
+    if not args.no_resume:
+        pending = [student for student in students if not os.path.exists(report_path(args.output_dir, student[0]))]
+    skipped = len(students) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} of {len(students)} reports already exist")
+
+    failed = 0
+    completed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.reference_cohort,)) as executor:
+        futures = {
+            executor.submit(build_report, student_id, student_name, rows, args.output_dir): student_id
+            for student_id, student_name, rows in pending
+        }
+        try:
+            for future in as_completed(futures):
+                completed += 1
+                try:
+                    future.result()
+                except Exception as error:
+                    failed += 1
+                    print(f"\nStudent {futures[future]} failed: {error}", file=sys.stderr)
+                rate = completed / max(time.perf_counter() - started, 1e-9)
+                print(f"\r[{completed}/{len(pending)}] {rate:.1f} reports/sec", end='', flush=True)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print(f"\nInterrupted after {completed} reports, run the same command again to resume.")
+            return 130
+
+    elapsed = time.perf_counter() - started
+    print()
+    print(f"Generated {completed - failed} reports ({failed} failed, {skipped} skipped) "
+          f"in {elapsed:.1f}s with {args.workers} workers: {(completed - failed) / max(elapsed, 1e-9):.2f} reports/sec")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
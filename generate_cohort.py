@@ -0,0 +1,182 @@
+"""
+Generate a synthetic cohort shaped like classified_student_data.csv.
+
+Usage:
+    python generate_cohort.py cohort_1m.csv --students 1000000 --seed 42
+    python generate_cohort.py cohort_10m.parquet --students 10000000 \\
+        --distribution arithmetic:0.65:30:9 --distribution geometry:0.72:30:10
+
+Every student answers every question in the question bank. Accuracy is a
+Bernoulli draw and time_spent a normal draw clipped at a minimum, both set
+per question type; --ability-spread adds a per-student skill offset so a
+student's answers are correlated. performance_category follows the same
+rules as process_responses, using the bank's per-question time thresholds.
+
+Rows are generated and written chunk by chunk, so memory stays flat however
+many students are requested. The output depends only on the options and
+--seed: chunk k draws from its own stream seeded with (seed, k).
+Parquet output needs pyarrow.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from EvaluationHandler import UnifiedStudentPerformanceReport
+from QuestionBank import QuestionBank
+
+# Matches the shipped cohort: about 70% correct, times around 30s with a 10s spread, at least 5s
+DEFAULT_DISTRIBUTION = {'accuracy': 0.7, 'time_mean': 30.0, 'time_std': 10.0, 'time_min': 5.0}
+
+
+def parse_distribution(value):
+    """
+    'type:accuracy:time_mean:time_std[:time_min]' -> (type, settings).
+    """
+    parts = value.split(':')
+    if len(parts) not in (4, 5):
+        raise argparse.ArgumentTypeError("Expected type:accuracy:time_mean:time_std[:time_min]")
+    try:
+        numbers = [float(part) for part in parts[1:]]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a number in {value!r}") from None
+    if not 0 <= numbers[0] <= 1:
+        raise argparse.ArgumentTypeError("accuracy must be between 0 and 1")
+    settings = dict(zip(['accuracy', 'time_mean', 'time_std', 'time_min'], numbers))
+    return parts[0], {**DEFAULT_DISTRIBUTION, **settings}
+
+
+def generate_chunk(rng, first_student_id, n_students, questions, ability_spread=0.0, with_names=False):
+    """
+    One chunk of rows for students first_student_id .. first_student_id + n_students - 1.
+
+    `questions` is bank_questions() output: parallel per-question arrays plus
+    the question type names their type_codes point into.
+    """
+    n_questions = len(questions['question_id'])
+    shape = (n_students, n_questions)
+
+    probability = np.broadcast_to(questions['accuracy'], shape)
+    if ability_spread:
+        # Shift each student's log-odds of answering correctly by one draw
+        logits = np.log(np.clip(probability, 1e-6, 1 - 1e-6) / np.clip(1 - probability, 1e-6, 1))
+        logits = logits + rng.normal(0.0, ability_spread, (n_students, 1))
+        probability = 1 / (1 + np.exp(-logits))
+    accuracy = (rng.random(shape) < probability).astype(np.int8).ravel()
+
+    time_spent = rng.normal(questions['time_mean'], questions['time_std'], shape)
+    time_spent = np.maximum(time_spent, questions['time_min']).ravel()
+
+    time_thresholds = np.tile(questions['time_threshold'], n_students)
+    rows = {
+        'student_id': np.repeat(np.arange(first_student_id, first_student_id + n_students, dtype=np.int64), n_questions),
+        'question_id': np.tile(questions['question_id'], n_students),
+        'question_type': pd.Categorical.from_codes(
+            np.tile(questions['type_codes'], n_students), categories=questions['type_names']
+        ),
+        'time_spent': time_spent,
+        'accuracy': accuracy,
+        'performance_category': UnifiedStudentPerformanceReport.classify(time_spent, accuracy, time_thresholds),
+    }
+    if with_names:
+        rows['student_name'] = pd.Series(rows['student_id']).map('Student {}'.format).to_numpy()
+    return pd.DataFrame(rows)
+
+
+def bank_questions(question_index, distributions):
+    """
+    The bank's questions as parallel arrays, with each type's distribution attached.
+    """
+    question_ids = question_index.scorer.question_ids
+    question_types = question_index.question_types
+    type_names = sorted(set(question_types))
+    unknown = set(distributions) - set(type_names)
+    if unknown:
+        raise ValueError(f"No questions of type {sorted(unknown)} in the question bank")
+
+    settings = [distributions.get(question_type, DEFAULT_DISTRIBUTION) for question_type in question_types]
+    return {
+        'question_id': question_ids,
+        'type_codes': np.array([type_names.index(question_type) for question_type in question_types]),
+        'type_names': type_names,
+        'time_threshold': question_index.time_thresholds,
+        **{name: np.array([setting[name] for setting in settings], dtype=np.float64) for name in DEFAULT_DISTRIBUTION},
+    }
+
+
+def generate_cohort(output, n_students, seed=0, chunk_students=100_000, distributions=None,
+                    ability_spread=0.0, with_names=False, question_bank_path=None, progress=None):
+    """
+    Write the cohort to `output` (.csv or .parquet) and return the number of rows written.
+    """
+    question_index = QuestionBank.shared(question_bank_path or UnifiedStudentPerformanceReport.QUESTION_BANK_PATH).index
+    questions = bank_questions(question_index, distributions or {})
+    parquet = output.endswith('.parquet')
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    writer = None
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    rows_written = 0
+    try:
+        with open(tmp_path, 'wb') as file:
+            for chunk_index, first in enumerate(range(0, n_students, chunk_students)):
+                rng = np.random.default_rng([seed, chunk_index])
+                chunk = generate_chunk(rng, first + 1, min(chunk_students, n_students - first), questions,
+                                       ability_spread=ability_spread, with_names=with_names)
+                if parquet:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(file, table.schema)
+                    writer.write_table(table)
+                else:
+                    chunk.to_csv(file, header=chunk_index == 0, index=False)
+                rows_written += len(chunk)
+                if progress is not None:
+                    progress(first + len(chunk) // len(questions['question_id']), rows_written)
+            if writer is not None:
+                writer.close()
+        # Readers never see a half-written cohort
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic cohort for load and capacity testing.")
+    parser.add_argument('output', help="Output file, .csv or .parquet")
+    parser.add_argument('--students', type=int, default=100_000, help="Number of students to generate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-students', type=int, default=100_000, help="Students generated per chunk")
+    parser.add_argument('--distribution', type=parse_distribution, action='append', default=[],
+                        metavar='TYPE:ACCURACY:MEAN:STD[:MIN]', help="Per question type accuracy and time distribution")
+    parser.add_argument('--ability-spread', type=float, default=0.0,
+                        help="Standard deviation of each student's skill offset, in log-odds")
+    parser.add_argument('--names', action='store_true', help="Add a student_name column")
+    parser.add_argument('--question-bank', default=None, help="Question bank to draw questions from")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(students_done, rows_written):
+        elapsed = time.perf_counter() - started
+        print(f"\r[{students_done}/{args.students}] {rows_written / elapsed:,.0f} rows/sec", end='', file=sys.stderr, flush=True)
+
+    rows = generate_cohort(
+        args.output, args.students, seed=args.seed, chunk_students=args.chunk_students,
+        distributions=dict(args.distribution), ability_spread=args.ability_spread, with_names=args.names,
+        question_bank_path=args.question_bank, progress=progress,
+    )
+    print(file=sys.stderr)
+    print(f"Wrote {rows} rows for {args.students} students to {args.output} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Production entry point: COUNTBUDDY under gunicorn with preloaded, fork-shared state.
+
+The app is imported and warmed up once in the gunicorn master (cohort frame,
+question bank, worksheet pools, clustering model, report template), then
+the workers are forked and share that memory copy-on-write. SIGHUP re-reads
+the cohort and question bank in the master and replaces the workers
+gracefully: new workers start from the fresh state while the old ones
+finish their in-flight requests. Report jobs are recorded in a SQLite
+file (REPORT_JOBS_PATH) rather than in worker memory, so a status poll can
+land on any worker, not just the one that accepted the submission.
+
+Usage:
+    python serve.py --workers 4 --threads 8 --bind 0.0.0.0:8000
+
+Every option can also be set through the environment (WEB_WORKERS,
+WEB_THREADS, WEB_BIND, WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT).
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+
+def default_workers():
+    return min(2 * multiprocessing.cpu_count() + 1, 8)
+
+
+def on_reload(arbiter):
+    # Runs in the master before the replacement workers are forked
+    import app as app_module
+    app_module.reload_state()
+    gc.collect()
+    gc.freeze()
+    arbiter.log.info("Reloaded cohort and question bank")
+
+
+class CountBuddyServer(BaseApplication):
+    """
+    gunicorn application that loads and warms the Flask app in the master.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        if self.application is None:
+            import app as app_module
+            app_module.warm_up()
+
+            # Keep the warmed objects out of the collector's reach, so its
+            # bookkeeping writes don't un-share their pages in the workers
+            gc.collect()
+            gc.freeze()
+            self.application = app_module.app
+        return self.application
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run COUNTBUDDY under gunicorn.")
+    parser.add_argument('--bind', default=os.environ.get('WEB_BIND', '0.0.0.0:8000'))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', default_workers())))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 4)))
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('WEB_TIMEOUT', 60)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)))
+    args = parser.parse_args(argv)
+
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'preload_app': True,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'on_reload': on_reload,
+        'accesslog': '-',
+    }
+    CountBuddyServer(options).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
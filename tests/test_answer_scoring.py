@@ -0,0 +1,69 @@
+"""
+AnswerScorer must keep scoring exactly like the per-answer evaluate_answer.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from AnswerScoring import AnswerScorer  # noqa: E402
+from EvaluationHandler import UnifiedStudentPerformanceReport  # noqa: E402
+
+# Right answers in the formats students send them, plus near misses and junk
+ANSWER_POOL = [
+    '9', '9.0', ' 9 ', '09', '9e0', 9, 9.0, '4', 4, '7', '8', '16', '16.0', 16,
+    'triangle', 'Triangle', ' TRIANGLE ', 'sphere', 'Sphere ', 'square', 'cube', 'Cone', 'cone ',
+    '', ' ', '1', '0', '-9', '9.5', 'nine', 'nan', 'NaN', 'inf', '-inf', '1e309', 'circle', 'tri angle',
+]
+
+
+def evaluate_answer(question_id, answer):
+    # evaluate_answer only needs the shared question bank, not a cohort
+    report = UnifiedStudentPerformanceReport.__new__(UnifiedStudentPerformanceReport)
+    report.form = None
+    return report.evaluate_answer(question_id, answer)
+
+
+def test_score_matches_evaluate_answer():
+    rng = random.Random(0)
+    scorer = UnifiedStudentPerformanceReport.answer_scorer()
+    question_ids = [int(question_id) for question_id in scorer.question_ids]
+
+    cases = [(rng.choice(question_ids), rng.choice(ANSWER_POOL)) for _ in range(20000)]
+    scored = scorer.score([question_id for question_id, _ in cases], [answer for _, answer in cases])
+
+    mismatches = [
+        (question_id, answer, int(accuracy))
+        for (question_id, answer), accuracy in zip(cases, scored)
+        if accuracy != evaluate_answer(question_id, answer)
+    ]
+    assert mismatches == []
+
+
+def test_unknown_question_ids_score_zero():
+    scorer = UnifiedStudentPerformanceReport.answer_scorer()
+    assert scorer.score([-1, 0, 10 ** 6], ['9', '9', '9']).tolist() == [0, 0, 0]
+
+
+def test_sparse_question_ids_use_no_dense_table():
+    scorer = AnswerScorer({3: 'a', 10 ** 12: 'b', -5: 7})
+    assert scorer._position_of is None
+    assert scorer.positions([10 ** 12, -5, 3, 4, 10 ** 13]).tolist() == [2, 0, 1, -1, -1]
+    assert scorer.score([10 ** 12, -5, 3, 4], ['B', '7.0', 'a', 'a']).tolist() == [1, 1, 1, 0]
+
+
+def test_batch_matches_single_submissions():
+    scorer = UnifiedStudentPerformanceReport.answer_scorer()
+    responses = {
+        1: [(1, 2.0, '9'), (6, 3.0, 'Triangle'), (11, 4.0, '6')],
+        2: [(15, 1.0, ' 16 '), (7, 8.0, 'cube')],
+    }
+    batch = scorer.score_batch(responses)
+    for student, rows in responses.items():
+        single = scorer.score([row[0] for row in rows], [row[2] for row in rows])
+        assert batch[student].tolist() == single.tolist()
@@ -0,0 +1,60 @@
+"""
+Progress rollups count each submission once and fold attempts in incrementally.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from ProgressHistory import ProgressHistory  # noqa: E402
+
+
+def scored_rows(accuracies, time_spent):
+    return pd.DataFrame({
+        'question_type': ['arithmetic'] * len(accuracies),
+        'accuracy': accuracies,
+        'time_spent': time_spent,
+    })
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ProgressHistory(str(tmp_path / 'progress.sqlite3'), alpha=0.5)
+
+
+def test_a_resubmitted_submission_counts_once(history):
+    progress, recorded = history.record_attempt(1, scored_rows([1, 0], [10, 20]), submission_key='same')
+    assert recorded
+    progress, recorded = history.record_attempt(1, scored_rows([1, 0], [10, 20]), submission_key='same')
+    assert not recorded
+    assert history.attempts(1) == 1
+    assert progress['arithmetic']['attempts'] == 1
+    assert len(progress['arithmetic']['history']) == 1
+
+    # The key is per student, and a different submission is another attempt
+    assert history.record_attempt(2, scored_rows([1], [10]), submission_key='same')[1]
+    assert history.record_attempt(1, scored_rows([1], [10]), submission_key='retake')[1]
+    assert history.attempts(1) == 2
+    assert history.attempts(2) == 1
+
+
+def test_trend_and_moving_average_after_two_attempts(history):
+    history.record_attempt(1, scored_rows([0, 1], [30, 50]), attempted_at=100.0)
+    progress, _ = history.record_attempt(1, scored_rows([1, 1], [10, 20]), attempted_at=200.0)
+
+    rollup = progress['arithmetic']
+    assert rollup['attempts'] == 2
+    assert rollup['first'] == {'accuracy': 0.5, 'time_spent': 40.0}
+    assert rollup['latest'] == {'accuracy': 1.0, 'time_spent': 15.0}
+    assert rollup['trend'] == {'accuracy': 0.5, 'time_spent': -25.0}
+    # alpha 0.5: halfway between the first attempt and the second
+    assert rollup['moving_average'] == {'accuracy': 0.75, 'time_spent': 27.5}
+    assert [entry['attempt'] for entry in rollup['history']] == [1, 2]
+    assert rollup['updated_at'] == 200.0
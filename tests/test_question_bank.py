@@ -0,0 +1,71 @@
+"""
+Test forms of a question bank are compiled and validated separately.
+
+Run with:
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from QuestionBank import QuestionBank  # noqa: E402
+from SubmissionParser import SubmissionError, SubmissionParser  # noqa: E402
+
+BANK = {
+    'default_form': 'A',
+    'forms': [
+        {'id': 'A', 'questions': [
+            {'id': 1, 'type': 'arithmetic', 'answer': 2, 'time_threshold': 20},
+            {'id': 2, 'type': 'geometry', 'answer': 'circle'},
+        ]},
+        {'id': 'B', 'questions': [
+            {'id': 1, 'type': 'geometry', 'answer': 'square', 'time_threshold': 40},
+            {'id': 2, 'type': 'arithmetic', 'answer': 5},
+        ]},
+    ],
+}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = tmp_path / 'bank.json'
+    path.write_text(json.dumps(BANK))
+    return QuestionBank(str(path))
+
+
+def test_forms_may_reuse_question_ids(bank):
+    assert bank.forms == ['A', 'B']
+    assert bank.index.form == 'A'
+    assert bank.form('B').question_types_for([1, 2]).tolist() == ['geometry', 'arithmetic']
+    assert bank.form('B').time_thresholds_for([1, 2]).tolist() == [40, QuestionBank.DEFAULT_TIME_THRESHOLD]
+    assert bank.form('A').scorer.score([1, 2], ['2', 'Circle']).tolist() == [1, 1]
+    assert bank.form('B').scorer.score([1, 2], ['2', 'Circle']).tolist() == [0, 0]
+
+
+def test_duplicate_ids_within_a_form_are_rejected():
+    with pytest.raises(ValueError):
+        QuestionBank.compile({'forms': [{'id': 'A', 'questions': BANK['forms'][0]['questions'] * 2}]})
+
+
+def test_ids_outside_the_logged_column_are_rejected():
+    QuestionBank.compile({'forms': [{'id': 'A', 'questions': [{'id': 40000, 'type': 'arithmetic', 'answer': 1}]}]})
+    with pytest.raises(ValueError):
+        QuestionBank.compile({'forms': [{'id': 'A', 'questions': [{'id': 2 ** 31, 'type': 'arithmetic', 'answer': 1}]}]})
+
+
+def test_submissions_pick_their_form(bank):
+    parser = SubmissionParser(bank)
+    assert parser.parse(b'[[1, 3, "2"]]').form == 'A'
+
+    submission = parser.parse(b'{"form": "B", "responses": [[1, 3, "square"], [2, 4, 5]]}')
+    assert submission.form == 'B'
+    assert submission.question_ids.tolist() == [1, 2]
+
+    with pytest.raises(SubmissionError) as error:
+        parser.parse(b'{"form": "C", "responses": [[1, 3, "2"]]}')
+    assert error.value.code == 'unknown_form'
@@ -0,0 +1,34 @@
+"""
+ReportCache keys must separate submissions whose reports differ.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from ReportCache import ReportCache  # noqa: E402
+
+
+def test_times_either_side_of_a_threshold_get_different_keys(tmp_path):
+    cache = ReportCache(str(tmp_path), time_bucket=1.0)
+
+    def key(time_spent, threshold=35.0):
+        return cache.key_for(1, 'Ann', [(1, time_spent, '9')], 'v1', time_thresholds=[threshold])
+
+    # Same one-second bucket, but only the first is within the threshold
+    assert round(34.6) == round(35.4)
+    assert key(34.6) != key(35.4)
+    assert key(34.6) == key(34.9)
+    assert key(35.4, threshold=40.0) == key(34.6, threshold=40.0)
+
+
+def test_normalized_answers_and_order_share_a_key(tmp_path):
+    cache = ReportCache(str(tmp_path))
+    key = cache.key_for(1, 'Ann', [(1, 10.2, '9'), (6, 3.0, 'Triangle')], 'v1')
+    assert cache.key_for(1, 'Ann', [(6, 3.1, ' triangle '), (1, 9.9, '9.0')], 'v1') == key
+    assert cache.key_for(1, 'Ann', [(1, 10.2, '9'), (6, 3.0, 'Triangle')], 'v2') != key
+    assert cache.key_for(2, 'Ann', [(1, 10.2, '9'), (6, 3.0, 'Triangle')], 'v1') != key
@@ -0,0 +1,75 @@
+"""
+Report job records must be visible to every process sharing the job table.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from ReportJobs import ReportJobQueue  # noqa: E402
+
+
+def test_status_is_shared_through_the_job_table(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    accepting, polling = ReportJobQueue(path), ReportJobQueue(path)
+    release = threading.Event()
+
+    job_id = accepting.submit(lambda: release.wait(5) and 'report_1_' + '0' * 32)
+    assert polling.status(job_id)['status'] in (ReportJobQueue.QUEUED, ReportJobQueue.RUNNING)
+
+    release.set()
+    accepting._executor.shutdown(wait=True)
+    job = polling.status(job_id)
+    assert job['status'] == ReportJobQueue.DONE
+    assert job['result'] == 'report_1_' + '0' * 32
+    assert polling.status('missing') is None
+
+
+def test_unfinished_jobs_with_the_same_key_are_coalesced(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    first_worker, second_worker = ReportJobQueue(path), ReportJobQueue(path)
+    release = threading.Event()
+    calls = []
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return 'report_1_' + '0' * 32
+
+    job_id = first_worker.submit(build, job_key='submission')
+    assert second_worker.submit(build, job_key='submission') == job_id
+    assert second_worker._executor is None
+    assert first_worker.submit(build, job_key='other') != job_id
+
+    release.set()
+    first_worker._executor.shutdown(wait=True)
+    assert len(calls) == 2
+    # Finished jobs are not reused, that is the report cache's job
+    assert second_worker.submit(lambda: None, job_key='submission') != job_id
+
+
+def test_failed_and_stale_jobs(tmp_path):
+    queue = ReportJobQueue(str(tmp_path / 'jobs.sqlite3'), timeout=0)
+
+    def fail():
+        raise ValueError("boom")
+
+    failed = queue.submit(fail)
+    queue._executor.shutdown(wait=True)
+    assert queue.status(failed)['status'] == ReportJobQueue.FAILED
+    assert queue.status(failed)['error'] == "boom"
+
+    # Never finished by the worker that queued it, e.g. after that worker was killed
+    stale, _ = queue._insert(ReportJobQueue.RUNNING)
+    assert queue.status(stale)['status'] == ReportJobQueue.FAILED
+
+
+def test_oldest_finished_jobs_are_pruned(tmp_path):
+    queue = ReportJobQueue(str(tmp_path / 'jobs.sqlite3'), max_jobs=3)
+    job_ids = [queue.add_completed(f'report_1_{index:032x}') for index in range(5)]
+    assert [queue.status(job_id) is not None for job_id in job_ids] == [False, False, True, True, True]
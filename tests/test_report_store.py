@@ -0,0 +1,49 @@
+"""
+Stored reports are addressed by their submission and removed once expired.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from ReportStore import ReportStore  # noqa: E402
+
+
+def test_rebuilding_a_submission_reuses_its_file(tmp_path):
+    store = ReportStore(str(tmp_path))
+    key = store.put(7, b'%PDF built at 10:00', 'submission')
+    etag = store.etag(key)
+
+    assert store.put(7, b'%PDF built at 10:05', 'submission') == key
+    assert os.listdir(tmp_path) == [ReportStore.filename(key)]
+    with open(store.path(key), 'rb') as file:
+        assert file.read() == b'%PDF built at 10:00'
+    assert store.etag(key) == etag
+
+    assert store.put(7, b'%PDF', 'another submission') != key
+    assert store.put(8, b'%PDF', 'submission') != key
+
+
+def test_old_reports_are_rewritten_then_pruned(tmp_path):
+    store = ReportStore(str(tmp_path), max_age=100)
+    key = store.put(7, b'%PDF old', 'submission')
+    etag = store.etag(key)
+
+    # Past half its age the stored copy is replaced, so the key stays good for a while
+    past = time.time() - 60
+    os.utime(store.path(key), (past, past))
+    assert store.put(7, b'%PDF new', 'submission') == key
+    with open(store.path(key), 'rb') as file:
+        assert file.read() == b'%PDF new'
+    assert store.etag(key) != etag
+
+    expired = store.put(8, b'%PDF', 'submission')
+    past = time.time() - 200
+    os.utime(store.path(expired), (past, past))
+    assert store.prune() == 1
+    assert store.exists(key) and not store.exists(expired)
@@ -0,0 +1,60 @@
+"""
+Logged submissions must reach the cohort frame unchanged, snapshot or not.
+
+Run with:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from CohortStore import CohortStore  # noqa: E402
+from SubmissionLog import SubmissionLog  # noqa: E402
+
+
+def scored_rows(student_id, question_ids):
+    return pd.DataFrame({
+        'student_id': student_id,
+        'student_name': f'Student {student_id}',
+        'question_id': question_ids,
+        'question_type': 'arithmetic',
+        'time_spent': 10.0,
+        'accuracy': 1,
+        'performance_category': 'Mastered',
+    })
+
+
+def test_large_question_ids_survive_compaction(tmp_path):
+    cohort_path = tmp_path / 'cohort.csv'
+    scored_rows(1, [1, 2]).to_csv(cohort_path, index=False)
+    log = SubmissionLog(str(tmp_path / 'submissions.sqlite3'), compact_every=2)
+
+    log.append(scored_rows(7, [40000, 40001]))
+    assert log.maybe_compact() == 2
+    log.append(scored_rows(8, [2 ** 31 - 1]))
+
+    data = CohortStore(str(cohort_path), submission_log=log).data
+    assert data['question_id'].tolist() == [1, 2, 40000, 40001, 2 ** 31 - 1]
+    assert data['student_id'].tolist() == [1, 1, -7, -7, -8]
+    assert log.pending_count() == 1
+
+
+def test_compaction_writes_segments_and_merges_them(tmp_path):
+    log = SubmissionLog(str(tmp_path / 'submissions.sqlite3'), compact_every=1)
+    for student_id in range(1, 33):
+        log.append(scored_rows(student_id, [1]))
+        assert log.maybe_compact() == 1
+
+    # One row per compaction, merged down like a binary counter
+    assert log._segments() == [(1, 32)]
+    log.append(scored_rows(33, [1]))
+    log.append(scored_rows(34, [1]))
+    log.compact()
+    assert log._segments() == [(1, 32), (33, 34)]
+    assert sorted(os.listdir(log.snapshot_dir)) == ['000000000001-000000000032.arrow', '000000000033-000000000034.arrow']
+    assert log.snapshot_frame()['student_id'].tolist() == list(range(1, 35))
+    assert log.snapshot_watermark() == 34